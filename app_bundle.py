@@ -0,0 +1,183 @@
+"""
+Precompiled app bundle for ``build_site.py --bundle``.
+
+Pyodide compiles every mounted ``.py`` file from source the first time it is imported.
+With ``--bundle`` the app's Python sources (PMO_Builder.py, app_pages/, src/, ...) are
+compiled to bytecode for the CPython release in the Pyodide lockfile's
+``info.python`` and packed, with their sources for tracebacks, into one deterministic
+``app_bundle.zip``. The zip is URL-mounted and put on ``sys.path`` by a line injected
+at the top of the entrypoint, so imports load through zipimport without per-file FS
+writes or in-browser compilation.
+
+Streamlit runs the entrypoint and page scripts by path, so build_site.py keeps those
+mounted as source files and bundles only the modules that are imported.
+
+Bytecode is tied to the CPython minor version, so compiling needs a matching
+interpreter: ``--bundle-python`` or ``python<major>.<minor>`` on PATH
+(``uv python install 3.13``).
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import zipfile
+
+from build_manifest import (
+    fingerprinted_path,
+    output_unchanged,
+    sha256_bytes,
+    sha256_json,
+    write_if_changed,
+)
+
+BUNDLE_NAME = "app_bundle.zip"
+# Fixed entry timestamp so identical sources produce an identical zip.
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Run by the target interpreter: compile sources in argv[1] to .pyc next to them.
+# Unchecked hash-based pycs (PEP 552) don't depend on source mtimes.
+_COMPILE_SCRIPT = """
+import json, py_compile, sys
+root, names = sys.argv[1], json.loads(sys.stdin.read())
+for name in names:
+    py_compile.compile(
+        f"{root}/{name}",
+        cfile=f"{root}/{name}c",
+        dfile=name,
+        doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+print(".".join(map(str, sys.version_info[:3])))
+"""
+
+
+def bundle_path_snippet(bundle_name: str = BUNDLE_NAME) -> str:
+    """Injected at the top of the entrypoint so imports resolve from the bundle."""
+    return (
+        "import os as _os, sys as _sys\n"
+        f"_bundle = _os.path.join(_os.path.dirname(_os.path.abspath(__file__)), {bundle_name!r})\n"
+        "if _bundle not in _sys.path:\n"
+        "    _sys.path.insert(0, _bundle)\n"
+        "del _os, _sys, _bundle\n\n"
+    )
+
+
+def _interpreter_version(interpreter: str) -> str | None:
+    try:
+        result = subprocess.run(
+            [interpreter, "-c", "import sys; print('.'.join(map(str, sys.version_info[:3])))"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def find_interpreter(python_version: str, interpreter: str | None = None) -> str:
+    """Return an interpreter whose major.minor matches python_version (e.g. '3.13.2')."""
+    minor = ".".join(python_version.split(".")[:2])
+    candidates = [interpreter] if interpreter else [f"python{minor}"]
+    for candidate in candidates:
+        path = shutil.which(candidate) or candidate
+        version = _interpreter_version(path)
+        if version is not None and version.split(".")[:2] == minor.split("."):
+            return path
+    raise RuntimeError(
+        f"--bundle needs a Python {minor} interpreter to compile for Pyodide "
+        f"(Python {python_version}); pass --bundle-python or run `uv python install {minor}`"
+    )
+
+
+def _compile(interpreter: str, sources: dict[str, str]) -> tuple[dict[str, bytes], str]:
+    """Return ({name + 'c': pyc bytes}, interpreter version) compiled by interpreter."""
+    names = sorted(name for name in sources if name.endswith(".py"))
+    with tempfile.TemporaryDirectory() as root:
+        for name in names:
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(sources[name])
+        result = subprocess.run(
+            [interpreter, "-c", _COMPILE_SCRIPT, root],
+            input=json.dumps(names),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        compiled = {}
+        for name in names:
+            with open(os.path.join(root, name + "c"), "rb") as f:
+                compiled[name + "c"] = f.read()
+    return compiled, result.stdout.strip()
+
+
+def deterministic_zip(entries: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as bundle:
+        for name in sorted(entries):
+            info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            bundle.writestr(info, entries[name])
+    return buffer.getvalue()
+
+
+def build_app_bundle(
+    build_dir: str,
+    manifest: dict,
+    reuse: dict,
+    sources: dict[str, str],
+    *,
+    python_version: str,
+    interpreter: str | None = None,
+    fingerprint: bool = False,
+) -> str:
+    """Write docs/app_bundle.zip for the ``.py`` files in sources; return its docs path.
+
+    Skips compiling when ``reuse`` shows the same sources were bundled for the same
+    Python version and the zip is still in place.
+    """
+    key = sha256_json(
+        {
+            "fingerprint": fingerprint,
+            "python": python_version,
+            "sources": {
+                name: sha256_bytes(content.encode())
+                for name, content in sources.items()
+                if name.endswith(".py")
+            },
+        }
+    )
+    previous = reuse.get("bundle", {})
+    if previous.get("key") == key and output_unchanged(
+        build_dir, reuse, previous["path"], previous["sha256"]
+    ):
+        manifest["bundle"] = previous
+        manifest["outputs"][previous["path"]] = previous["sha256"]
+        return previous["path"]
+
+    interpreter = find_interpreter(python_version, interpreter)
+    compiled, version = _compile(interpreter, sources)
+    entries = {name: content.encode() for name, content in sources.items() if name.endswith(".py")}
+    entries.update(compiled)
+    data = deterministic_zip(entries)
+    digest = sha256_bytes(data)
+    output_path = fingerprinted_path(BUNDLE_NAME, digest) if fingerprint else BUNDLE_NAME
+    write_if_changed(os.path.join(build_dir, output_path), data)
+    manifest["outputs"][output_path] = digest
+    manifest["bundle"] = {
+        "key": key,
+        "path": output_path,
+        "sha256": digest,
+        "python": version,
+        "modules": len(compiled),
+        "size": len(data),
+    }
+    return output_path
@@ -0,0 +1,108 @@
+"""
+Boot phase timing for ``build_site.py --boot-timing``.
+
+A cold start goes through several phases, and which one dominates depends on the
+visitor's network and CPU. With ``--boot-timing`` index.html records them as
+``window.__pmoBootTimings.marks`` (milliseconds since navigation start, also added
+as ``pmo:<name>`` performance marks for the DevTools timeline) and logs each one to
+the console:
+
+- ``page_start``: the first script in ``<head>`` runs
+- ``stlite_mount``: stlite.js has loaded and ``mount()`` is called
+- ``pyodide_ready``: the worker starts downloading its first wheel (after
+  ``loadPyodide`` returned), from the worker's resource timing
+- ``requirements_installed``: the last write to site-packages
+- ``app_script_start``: ``PMO_Builder.py`` starts running
+- ``first_render``: the first Streamlit element appears in the page
+
+``window.__pmoBootTimings.imports`` has the first import of each module in
+``TIMED_IMPORTS`` (``{"start", "duration"}``, or ``{"before_app": true}`` when
+Streamlit had already imported it). The worker-side marks come from a snippet injected
+at the top of ``PMO_Builder.py`` (like ``submodule_commit_log_snippet``) and reach
+the page over a ``BroadcastChannel``. The snippet does nothing outside Pyodide and
+only records the first run, not Streamlit's reruns.
+"""
+
+from __future__ import annotations
+
+CHANNEL_NAME = "pmo-boot-timing"
+TIMED_IMPORTS = ("pandas", "openpyxl", "pmotools", "fuzzywuzzy")
+
+_SNIPPET = """\
+def _pmo_boot_timing():
+    import sys
+    if hasattr(sys, "_pmo_boot_timing"):
+        return
+    try:
+        from js import BroadcastChannel, performance
+    except ImportError:
+        return
+    import json, os, site
+
+    channel = sys._pmo_boot_timing = BroadcastChannel.new(%(channel)r)
+
+    def now():
+        return performance.timeOrigin + performance.now()
+
+    def post(name, at, duration=None):
+        channel.postMessage(json.dumps({"name": name, "at": at, "duration": duration}))
+
+    wheels = [
+        entry.startTime
+        for entry in performance.getEntriesByType("resource")
+        if entry.name.split("?")[0].endswith(".whl")
+    ]
+    if wheels:
+        post("pyodide_ready", performance.timeOrigin + min(wheels))
+    post("requirements_installed", os.stat(site.getsitepackages()[0]).st_mtime * 1000)
+    post("app_script_start", now())
+
+    pending = set(%(imports)r)
+    for name in sorted(pending & sys.modules.keys()):
+        post("import " + name, None)
+    pending -= sys.modules.keys()
+
+    class TimedLoader:
+        def __init__(self, loader, name):
+            self.loader, self.name = loader, name
+
+        def __getattr__(self, attribute):
+            return getattr(self.loader, attribute)
+
+        def create_module(self, spec):
+            return self.loader.create_module(spec)
+
+        def exec_module(self, module):
+            start = now()
+            try:
+                self.loader.exec_module(module)
+            finally:
+                module.__loader__ = module.__spec__.loader = self.loader
+                post("import " + self.name, start, now() - start)
+
+    class ImportTimer:
+        def find_spec(self, name, path=None, target=None):
+            if name not in pending:
+                return None
+            pending.discard(name)
+            for finder in sys.meta_path:
+                if finder is not self and hasattr(finder, "find_spec"):
+                    spec = finder.find_spec(name, path, target)
+                    if spec is not None:
+                        if spec.loader is not None:
+                            spec.loader = TimedLoader(spec.loader, name)
+                        return spec
+            return None
+
+    sys.meta_path.insert(0, ImportTimer())
+
+
+_pmo_boot_timing()
+del _pmo_boot_timing
+
+"""
+
+
+def boot_timing_snippet() -> str:
+    """Injected at the top of the entrypoint to post worker-side marks to the page."""
+    return _SNIPPET % {"channel": CHANNEL_NAME, "imports": TIMED_IMPORTS}
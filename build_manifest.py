@@ -0,0 +1,138 @@
+"""
+Content-hash manifest for docs/ builds.
+
+``docs/build-manifest.json`` records a sha256 for every build input (bundled
+pmotools-app files, template.jinja, resolved requirements, stlite/Pyodide pins) and
+for every file the build writes under docs/. ``build_site.py --incremental`` compares
+the current inputs with the previous manifest to skip unchanged asset copies and the
+index.html render.
+
+Outputs are only rewritten when their bytes change, so rebuilding unchanged inputs
+leaves docs/ byte-identical and untouched (no spurious diffs in the rebuild workflow).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+
+MANIFEST_NAME = "build-manifest.json"
+MANIFEST_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1 << 20
+# Hex digits of the content hash in fingerprinted names (PMO_logo.<hash>.png); must
+# match simple_server.py, which serves such paths as immutable.
+FINGERPRINT_LENGTH = 16
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_json(value: object) -> str:
+    """Stable hash of a JSON-serialisable value (key order does not matter)."""
+    return sha256_bytes(json.dumps(value, sort_keys=True).encode())
+
+
+def fingerprinted_path(path: str, digest: str) -> str:
+    """``images/PMO_logo.png`` -> ``images/PMO_logo.<hash>.png``."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def new_manifest() -> dict:
+    return {"version": MANIFEST_VERSION, "inputs": {}, "outputs": {}}
+
+
+def load_manifest(build_dir: str) -> dict:
+    """Return the manifest from the previous build, or an empty one."""
+    path = os.path.join(build_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return new_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+    return manifest
+
+
+def write_if_changed(path: str, data: str | bytes) -> bool:
+    """Write data to path unless the file already holds these exact bytes."""
+    if isinstance(data, str):
+        data = data.encode()
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def write_chunks_if_changed(path: str, chunks: Iterable[bytes]) -> str:
+    """Stream chunks to path and return their sha256, without holding them in memory.
+
+    The chunks go to a temporary sibling, which replaces path only if the bytes differ.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+        unchanged = (
+            os.path.isfile(path)
+            and os.path.getsize(path) == os.path.getsize(tmp_path)
+            and sha256_file(path) == digest.hexdigest()
+        )
+        if unchanged:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest()
+
+
+def output_unchanged(build_dir: str, previous: dict, rel_path: str, digest: str) -> bool:
+    """True if the previous build wrote ``digest`` to rel_path and the file is still there."""
+    if previous.get("outputs", {}).get(rel_path) != digest:
+        return False
+    return os.path.isfile(os.path.join(build_dir, rel_path))
+
+
+def remove_stale_outputs(build_dir: str, previous: dict, manifest: dict) -> list[str]:
+    """Delete files written by the previous build that this build no longer produces."""
+    removed = []
+    current = manifest["outputs"]
+    for rel_path in sorted(previous.get("outputs", {})):
+        if rel_path in current:
+            continue
+        path = os.path.join(build_dir, rel_path)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(rel_path)
+    return removed
+
+
+def save_manifest(build_dir: str, manifest: dict) -> bool:
+    text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    return write_if_changed(os.path.join(build_dir, MANIFEST_NAME), text)
@@ -1,11 +1,51 @@
+import argparse
+import ast
 import json
 import jinja2
 import os
-import shutil
 import sys
+import time
 
+from app_bundle import BUNDLE_NAME, build_app_bundle, bundle_path_snippet
+from boot_timing import CHANNEL_NAME as BOOT_TIMING_CHANNEL, boot_timing_snippet
+from build_profile import BuildProfiler
+from build_workers import DEFAULT_JOBS, copy_file, map_ordered
+from columnar_data import READER_PACKAGE, convert_example_data
+from build_manifest import (
+    fingerprinted_path,
+    load_manifest,
+    new_manifest,
+    output_unchanged,
+    remove_stale_outputs,
+    save_manifest,
+    sha256_bytes,
+    sha256_file,
+    sha256_json,
+    write_chunks_if_changed,
+    write_if_changed,
+)
+from lock_index import normalize_name
+from minify_sources import load_config as load_minify_config, minify_sources
+from image_assets import DEFAULT_BUDGET, DEFAULT_FORMATS, IMAGE_FORMATS, ImageOptimizer
+from offline_assets import vendor_offline_assets
+from preload_hints import boot_hints
+from precompress import precompress_outputs
+from site_packages import ARCHIVE_NAME, build_site_packages
+from size_report import (
+    BUDGETS_PATH,
+    build_size_report,
+    check_budgets,
+    diff_reports,
+    format_markdown,
+    load_budgets,
+    load_report,
+    write_size_report,
+)
+from service_worker import SERVICE_WORKER_NAME, retire_service_worker, write_service_worker
 from stlite_requirements import (
+    fetch_pyodide_lock,
     pmotools_app_commit_hash,
+    pyodide_lock_index,
     resolve_stlite_requirements,
     submodule_commit_log_snippet,
 )
@@ -16,7 +56,11 @@ _STLITE_BROWSER_VERSION = "1.2.0"
 # @stlite/browser@1.2.0 loads this Pyodide release (stlite packages/kernel/src/worker.ts).
 _PYODIDE_VERSION = "0.28.2"
 
+_resolve_started = time.perf_counter()
 requirements, _requirement_warnings = resolve_stlite_requirements(_PYODIDE_VERSION)
+# Import-time phases, reported by the first build_site() call in this process only
+# (later --watch rebuilds and benchmark iterations reuse the resolved requirements).
+_IMPORT_PHASES = {"resolve_requirements": time.perf_counter() - _resolve_started}
 _PMOTOOLS_APP_COMMIT = pmotools_app_commit_hash()
 _COMMIT_LOG_SNIPPET = submodule_commit_log_snippet(pmotools_app_commit=_PMOTOOLS_APP_COMMIT)
 
@@ -47,6 +91,15 @@ _404_HTML = """<!doctype html>
 """
 
 _STATIC_ASSET_SKIP_PREFIXES = (".", "~$")
+# --lazy-mount: app files outside the entrypoint's eager imports are served from here.
+_LAZY_MOUNT_SUBDIR = "app"
+_ASSET_MANIFEST_NAME = "asset-manifest.json"
+# --bundle: Streamlit runs these by path (st.Page / multipage dirs), so they stay files.
+_SCRIPT_DIRS = ("app_pages/", "pages/")
+# Inlined into index.html (or, with --lazy-mount/--bundle, mounted as app files).
+_SOURCE_EXTENSIONS = (".py", ".json")
+# Top-level pmotools-app directories whose files are copied to docs/ and URL-mounted.
+_URL_MOUNTED_DIRS = ("images", "example_data")
 
 
 def _should_skip_static_asset(filename: str) -> bool:
@@ -55,96 +108,761 @@ def _should_skip_static_asset(filename: str) -> bool:
 
 def _add_url_mounted_assets(
     parsed_files: list[dict],
+    manifest: dict,
+    reuse: dict,
     *,
     source_dir: str,
+    filenames: list[str],
     virtual_prefix: str,
     build_subdir: str,
+    fingerprint: bool = False,
+    images: ImageOptimizer | None = None,
+    jobs: int = 1,
 ) -> None:
-    """Copy files into docs/ and register them for stlite URL mounting."""
-    if not os.path.isdir(source_dir):
+    """Copy files into docs/ and register them for stlite URL mounting.
+
+    Copies are skipped when ``reuse`` (the previous manifest, incremental builds only)
+    shows the destination already holds the same content. With ``fingerprint=True``
+    the copy is named after its content hash; the virtual path the app sees is not.
+    Files ``images`` handles are written optimized instead of copied.
+
+    Files are hashed and copied on up to ``jobs`` threads; the manifest and
+    ``parsed_files`` are updated afterwards in ``filenames`` order.
+    """
+    if not filenames:
         return
 
     dest_dir = os.path.join(build_dir, build_subdir)
     os.makedirs(dest_dir, exist_ok=True)
 
-    for filename in sorted(os.listdir(source_dir)):
-        if _should_skip_static_asset(filename):
-            continue
+    def process(filename: str) -> tuple[str, str, dict | None]:
         source_path = os.path.join(source_dir, filename)
-        if not os.path.isfile(source_path):
-            continue
+        digest = sha256_file(source_path)
+        if images is not None and images.handles(filename):
+            return digest, "", images.encode(source_path, digest, f"{virtual_prefix}/{filename}")
+        output_path = f"{build_subdir}/{filename}"
+        if fingerprint:
+            output_path = fingerprinted_path(output_path, digest)
+        if not output_unchanged(build_dir, reuse, output_path, digest):
+            copy_file(source_path, os.path.join(build_dir, output_path))
+        return digest, output_path, None
 
-        shutil.copy(source_path, os.path.join(dest_dir, filename))
+    for filename, (digest, output_path, image) in zip(
+        filenames, map_ordered(process, filenames, jobs)
+    ):
+        source_path = os.path.join(source_dir, filename)
+        manifest["inputs"][source_path.replace(os.sep, "/")] = digest
         virtual_path = f"{virtual_prefix}/{filename}"
+        if image is not None:
+            virtual_path, output_path = images.record(virtual_path, image)
+        else:
+            manifest["outputs"][output_path] = digest
+        if fingerprint:
+            manifest["assets"][virtual_path] = output_path
         parsed_files.append(
-            {"name": virtual_path, "content": {"url": virtual_path}}
+            {"name": virtual_path, "content": {"url": output_path}}
         )
 
 
-def build_site():
+def _read_text(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+def _scan_app(
+    ignored_dirs: list[str], jobs: int = 1
+) -> tuple[dict[str, str], dict[str, list[str]]]:
+    """Walk pmotools-app once and classify its files.
+
+    Returns ({virtual path: text} for ``_SOURCE_EXTENSIONS`` files, read on up to
+    ``jobs`` threads; {directory in ``_URL_MOUNTED_DIRS``: sorted file names to
+    URL-mount}); everything else is skipped. A source file inside a URL-mounted
+    directory is in both.
+    """
+    source_paths = []
+    mounted = {directory: [] for directory in _URL_MOUNTED_DIRS}
+    for root, dirs, files in os.walk("pmotools-app"):
+        dirs.sort()
+        rel_root = os.path.relpath(root, "pmotools-app").replace(os.sep, "/")
+        if rel_root in mounted:
+            mounted[rel_root] = sorted(
+                file
+                for file in files
+                if not _should_skip_static_asset(file) and os.path.isfile(os.path.join(root, file))
+            )
+        if any(dir in root for dir in ignored_dirs):
+            continue
+        for file in sorted(files):
+            if file.endswith(_SOURCE_EXTENSIONS):
+                source_paths.append(os.path.join(root, file))
+    texts = map_ordered(_read_text, source_paths, jobs)
+    sources = {
+        path.replace("pmotools-app/", ""): text for path, text in zip(source_paths, texts)
+    }
+    return sources, mounted
+
+
+def _mount_files(inline_sources: dict[str, str], url_mounted: list[dict]):
+    """Yield the mount() ``files`` entries sorted by name.
+
+    Inline sources are JSON-encoded one at a time as the template consumes them, so
+    the encoded copies never accumulate in memory.
+    """
+    entries = [(item["name"], item["content"]) for item in url_mounted]
+    entries += [(name, None) for name in inline_sources]
+    entries.sort(key=lambda entry: entry[0])
+    for name, content in entries:
+        if content is None:
+            content = json.dumps(inline_sources[name])
+        yield {"name": name, "content": content}
+
+
+def _eager_imports(sources: dict[str, str], entry: str) -> set[str]:
+    """Files the entrypoint needs at import time: itself plus local modules imported at
+    module level, transitively (function-level imports and page scripts are excluded)."""
+    eager = set()
+    pending = [entry]
+    while pending:
+        name = pending.pop()
+        if name in eager or name not in sources:
+            continue
+        eager.add(name)
+        for node in ast.parse(sources[name]).body:
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for module in modules:
+                parts = module.split(".")
+                # Each package's __init__.py runs before the module itself.
+                for depth in range(1, len(parts) + 1):
+                    pending.append("/".join(parts[:depth]) + "/__init__.py")
+                pending.append("/".join(parts) + ".py")
+    return eager
+
+
+def _with_requirement(requirements: list[str], package: str) -> list[str]:
+    """requirements plus package at its Pyodide lockfile version, unless already there."""
+    names = {normalize_name(requirement.split("==")[0]) for requirement in requirements}
+    if normalize_name(package) in names:
+        return requirements
+    version = pyodide_lock_index(_PYODIDE_VERSION)["packages"][normalize_name(package)]["version"]
+    return [*requirements, f"{package}=={version}"]
+
+
+def _print_minify_report(report: dict) -> None:
+    saved = {
+        name: before - after for name, (before, after) in report["files"].items() if before > after
+    }
+    for name in sorted(saved, key=saved.get, reverse=True):
+        before, after = report["files"][name]
+        print(f"minified {name}: {before} -> {after} bytes (-{saved[name] / before:.0%})")
+    before = sum(before for before, _ in report["files"].values())
+    after = sum(after for _, after in report["files"].values())
+    if before:
+        print(f"minified sources: {before} -> {after} bytes (-{(before - after) / before:.0%})")
+    if report["excluded"]:
+        print(f"not shipped (minify exclude): {', '.join(report['excluded'])}")
+
+
+def _requirements_js(requirements: list[str]) -> str:
+    """JS array for mount(); vendored wheel paths become absolute URLs for micropip."""
+    items = []
+    for requirement in requirements:
+        if requirement.endswith(".whl"):
+            items.append(f"new URL({json.dumps(requirement)}, location.href).href")
+        else:
+            items.append(json.dumps(requirement))
+    return "[" + ", ".join(items) + "]"
+
+
+def build_site(
+    *,
+    incremental: bool = False,
+    livereload: bool = False,
+    precompress: bool = False,
+    offline: bool = False,
+    lazy_mount: bool = False,
+    fingerprint: bool = False,
+    service_worker: bool = False,
+    optimize_images: bool = False,
+    image_formats: tuple[str, ...] = DEFAULT_FORMATS,
+    image_budget: int | None = DEFAULT_BUDGET,
+    bundle: bool = False,
+    bundle_python: str | None = None,
+    jobs: int = DEFAULT_JOBS,
+    columnar_data: bool = False,
+    site_packages: bool = False,
+    size_report: bool = False,
+    size_budgets: str | None = None,
+    size_diff: str | None = None,
+    minify: bool = False,
+    preload_hints: bool = False,
+    boot_timing: bool = False,
+):
+    """Render docs/ from pmotools-app.
+
+    With ``incremental=True``, unchanged asset copies and an unchanged index.html
+    render are skipped using the content hashes in docs/build-manifest.json.
+    ``livereload=True`` adds the client for ``simple_server.py --watch``.
+    ``precompress=True`` writes .br/.gz siblings for compressible outputs.
+    ``offline=True`` vendors stlite, Pyodide and the wheels into docs/assets/.
+    ``lazy_mount=True`` inlines only the entrypoint and its eager imports; other app
+    files are written under docs/app/ and URL-mounted.
+    ``fingerprint=True`` names URL-mounted outputs after their content hash and
+    writes the mapping to docs/asset-manifest.json.
+    ``service_worker=True`` writes docs/sw.js, which precaches the build outputs and
+    serves them cache-first.
+    ``optimize_images=True`` recompresses images/ (see image_assets.py), adds favicon
+    renditions and fails if an image exceeds ``image_budget`` bytes.
+    ``bundle=True`` ships imported modules as one precompiled docs/app_bundle.zip
+    (compiled by ``bundle_python`` or a matching python3.X on PATH).
+    ``columnar_data=True`` adds Parquet copies of the example tables and the
+    ``pmo_columnar`` loader (see columnar_data.py).
+    ``site_packages=True`` ships the non-lockfile requirements as one prebuilt
+    docs/site-packages.zip that stlite unpacks, instead of installing them with
+    micropip (see site_packages.py).
+    ``minify=True`` drops the app files excluded in pyproject.toml's
+    ``[tool.pmo-build.minify]`` and strips comments, docstrings and indentation from
+    the Python sources, keeping line numbers (see minify_sources.py).
+    ``preload_hints=True`` adds preconnect/modulepreload/preload links for stlite,
+    the Pyodide core files and the lockfile wheels to index.html's head (see
+    preload_hints.py).
+    ``boot_timing=True`` records boot phase and first-import times in the browser as
+    ``window.__pmoBootTimings`` and logs them to the console (see boot_timing.py).
+    ``size_report=True`` writes docs/size-report.json, compares it with the previous
+    build's and fails if it exceeds the budgets in ``size_budgets`` (default
+    size-budgets.json when it exists); ``size_diff`` is a file the Markdown comparison
+    is appended to (see size_report.py).
+    ``jobs`` bounds the threads that read, hash, copy, encode and compress files;
+    the output is the same for any value.
+
+    Returns the per-phase profile (see build_profile.py).
+    """
+    manifest = new_manifest()
+    profiler = BuildProfiler(manifest)
+    for name, seconds in _IMPORT_PHASES.items():
+        profiler.add(name, seconds)
+    _IMPORT_PHASES.clear()
+    profiler.begin("load_template")
+
     # Load the template
     template_path = os.path.join(os.path.dirname(__file__), "template.jinja")
     with open(template_path, "r") as f:
-        template = jinja2.Template(f.read())
+        template_source = f.read()
 
-    # Load the python files in all subdirectories
-    parsed_files = []
+    previous = load_manifest(build_dir)
+    reuse = previous if incremental else {}
+    manifest["inputs"]["template.jinja"] = sha256_bytes(template_source.encode())
+    manifest["pins"] = {
+        "pmotools_app_commit": _PMOTOOLS_APP_COMMIT,
+        "pyodide": _PYODIDE_VERSION,
+        "stlite_browser": _STLITE_BROWSER_VERSION,
+    }
+    # The app's requirements plus packages build stages add (e.g. the Parquet reader).
+    build_requirements = requirements
+    if fingerprint:
+        manifest["assets"] = {}
+
+    # Load the python and conf files in all subdirectories, and list the assets
+    profiler.begin("scan_app")
     ignored_dirs = [".venv", ".github", "tests"]
-    for root, dirs, files in os.walk("pmotools-app"):
-        if any(dir in root for dir in ignored_dirs):
-            continue
-        for file in files:
-            if file.endswith(".py"):
-                with open(os.path.join(root, file), "r") as f:
-                    file_name = os.path.join(root, file).replace("pmotools-app/", "")
-                    content = f.read()
-                    if file_name == "PMO_Builder.py":
-                        content = _COMMIT_LOG_SNIPPET + content
-                    parsed_files.append({"name": file_name, "content": json.dumps(content)})
+    sources, mounted = _scan_app(ignored_dirs, jobs)
+    if "PMO_Builder.py" in sources:
+        sources["PMO_Builder.py"] = _COMMIT_LOG_SNIPPET + sources["PMO_Builder.py"]
+        if boot_timing:
+            sources["PMO_Builder.py"] = boot_timing_snippet() + sources["PMO_Builder.py"]
+    for file_name, content in sources.items():
+        manifest["inputs"][f"pmotools-app/{file_name}"] = sha256_bytes(content.encode())
+
+    # Ship only runtime modules, without comments and docstrings
+    minify_config = None
+    if minify:
+        profiler.begin("minify")
+        minify_config = load_minify_config()
+        sources, minified = minify_sources(sources, entrypoint=entrypoint, config=minify_config)
+        for warning in minified.pop("warnings"):
+            print(f"warning: {warning}", file=sys.stderr)
+        manifest["minify"] = minified
+        _print_minify_report(minified)
+
+    parsed_files = []
+    images = None
+    if optimize_images:
+        images = ImageOptimizer(
+            build_dir,
+            manifest,
+            reuse,
+            formats=image_formats,
+            budget=image_budget,
+            fingerprint=fingerprint,
+        )
 
     # Add static image assets
+    profiler.begin("images")
     _add_url_mounted_assets(
         parsed_files,
+        manifest,
+        reuse,
         source_dir=os.path.join("pmotools-app", "images"),
+        filenames=mounted["images"],
         virtual_prefix="images",
         build_subdir="images",
+        fingerprint=fingerprint,
+        images=images,
+        jobs=jobs,
     )
+    if images is not None:
+        images.check_budget()
+        sources = images.rewrite_references(sources)
 
     # Add example data files used by the app (e.g. PMO template download)
+    profiler.begin("example_data")
     _add_url_mounted_assets(
         parsed_files,
+        manifest,
+        reuse,
         source_dir=os.path.join("pmotools-app", "example_data"),
+        filenames=mounted["example_data"],
         virtual_prefix="example_data",
         build_subdir="example_data",
+        fingerprint=fingerprint,
+        jobs=jobs,
     )
 
-    # Add conf files to the parsed files
-    for root, dirs, files in os.walk("pmotools-app"):
-        if any(dir in root for dir in ignored_dirs):
-            continue
-        for file in files:
-            if file.endswith(".json"):
-                with open(os.path.join(root, file), "r") as f:
-                    file_name = os.path.join(root, file).replace("pmotools-app/", "")
-                    parsed_files.append({"name": file_name, "content": json.dumps(f.read())})
+    # Parquet copies of the example tables, for the app to load instead of parsing CSV
+    if columnar_data:
+        profiler.begin("columnar_data")
+        columnar_files = convert_example_data(
+            build_dir,
+            manifest,
+            reuse,
+            source_dir=os.path.join("pmotools-app", "example_data"),
+            filenames=mounted["example_data"],
+            virtual_prefix="example_data",
+            build_subdir="example_data",
+            fingerprint=fingerprint,
+            jobs=jobs,
+        )
+        if fingerprint:
+            for item in columnar_files:
+                manifest["assets"][item["name"]] = item["content"]["url"]
+        parsed_files.extend(columnar_files)
+        build_requirements = _with_requirement(build_requirements, READER_PACKAGE)
 
+    # PyPI requirements arrive as one archive unpacked into site-packages; micropip
+    # only installs lockfile packages.
+    site_packages_mount = None
+    if site_packages:
+        profiler.begin("site_packages")
+        snapshot = build_site_packages(
+            build_dir,
+            manifest,
+            reuse,
+            requirements=build_requirements,
+            lock=pyodide_lock_index(_PYODIDE_VERSION),
+            fingerprint=fingerprint,
+        )
+        for warning in snapshot["warnings"]:
+            print(f"warning: {warning}", file=sys.stderr)
+        if fingerprint:
+            manifest["assets"][ARCHIVE_NAME] = snapshot["path"]
+        site_packages_mount = {"url": snapshot["path"], "extract_dir": snapshot["extract_dir"]}
+        build_requirements = snapshot["requirements"]
+    manifest["requirements"] = build_requirements
 
-    parsed_files.sort(key=lambda item: item["name"])
+    # Imported modules load from one precompiled zip; scripts Streamlit runs by path
+    # stay mounted as files.
+    if bundle:
+        profiler.begin("bundle")
+        bundled = {
+            name: content
+            for name, content in sources.items()
+            if name.endswith(".py") and name != entrypoint and not name.startswith(_SCRIPT_DIRS)
+        }
+        bundle_url = build_app_bundle(
+            build_dir,
+            manifest,
+            reuse,
+            bundled,
+            python_version=pyodide_lock_index(_PYODIDE_VERSION)["info"]["python"],
+            interpreter=bundle_python,
+            fingerprint=fingerprint,
+        )
+        if fingerprint:
+            manifest["assets"][BUNDLE_NAME] = bundle_url
+        parsed_files.append({"name": BUNDLE_NAME, "content": {"url": bundle_url}})
+        sources = {name: content for name, content in sources.items() if name not in bundled}
+        sources[entrypoint] = bundle_path_snippet() + sources[entrypoint]
+
+    # URL-mount app files the entrypoint doesn't import eagerly, so index.html stays
+    # small and a page edit only invalidates that file in the browser cache.
+    inline_sources = sources
+    if lazy_mount:
+        profiler.begin("lazy_mount")
+        eager = _eager_imports(sources, entrypoint)
+        inline_sources = {name: content for name, content in sources.items() if name in eager}
+
+        def write_lazy(file_name: str) -> tuple[str, str]:
+            output_path = f"{_LAZY_MOUNT_SUBDIR}/{file_name}"
+            data = sources[file_name].encode()
+            digest = sha256_bytes(data)
+            if fingerprint:
+                output_path = fingerprinted_path(output_path, digest)
+            write_if_changed(os.path.join(build_dir, output_path), data)
+            return output_path, digest
+
+        lazy_names = sorted(name for name in sources if name not in eager)
+        for file_name, (output_path, digest) in zip(
+            lazy_names, map_ordered(write_lazy, lazy_names, jobs)
+        ):
+            if fingerprint:
+                manifest["assets"][file_name] = output_path
+            manifest["outputs"][output_path] = digest
+            parsed_files.append({"name": file_name, "content": {"url": output_path}})
+
+    # Serve stlite, Pyodide and the wheels from docs/assets/ instead of CDNs/PyPI
+    offline_assets = None
+    mount_requirements = build_requirements
+    if offline:
+        profiler.begin("offline_assets")
+        offline_assets = vendor_offline_assets(
+            build_dir,
+            manifest,
+            reuse,
+            stlite_version=_STLITE_BROWSER_VERSION,
+            pyodide_version=_PYODIDE_VERSION,
+            requirements=build_requirements,
+            lock=fetch_pyodide_lock(_PYODIDE_VERSION),
+        )
+        for warning in offline_assets.pop("warnings"):
+            print(f"warning: {warning}", file=sys.stderr)
+        mount_requirements = _requirements_js(offline_assets["requirements"])
+
+    # Start the stlite -> Pyodide -> wheels downloads while index.html is parsed
+    hints = []
+    if preload_hints:
+        profiler.begin("preload_hints")
+        hints = boot_hints(
+            stlite_version=_STLITE_BROWSER_VERSION,
+            pyodide_version=_PYODIDE_VERSION,
+            requirements=build_requirements,
+            lock=pyodide_lock_index(_PYODIDE_VERSION),
+            offline=offline_assets,
+            outputs=manifest["outputs"],
+            site_packages_url=site_packages_mount["url"] if site_packages_mount else None,
+        )
+
+    # Everything that reaches index.html; if none of it changed, skip the render.
+    profiler.begin("render_key")
+    manifest["render_key"] = sha256_json(
+        {
+            "entrypoint": entrypoint,
+            "livereload": livereload,
+            "minify": minify_config,
+            "offline": offline_assets,
+            "preload_hints": hints,
+            "boot_timing": boot_timing,
+            "assets": manifest.get("assets"),
+            "service_worker": service_worker,
+            "site_packages": site_packages_mount,
+            "images": manifest.get("images"),
+            "files": sorted(
+                [name, manifest["inputs"][f"pmotools-app/{name}"]] for name in inline_sources
+            )
+            + sorted([item["name"], item["content"]] for item in parsed_files),
+            "requirements": build_requirements,
+            "template": manifest["inputs"]["template.jinja"],
+        }
+    )
+    index_digest = reuse.get("outputs", {}).get("index.html")
+    if reuse.get("render_key") != manifest["render_key"] or not output_unchanged(
+        build_dir, reuse, "index.html", index_digest
+    ):
+        # Stream the rendered template to the output file
+        profiler.begin("render")
+        template = jinja2.Template(template_source)
+        rendered = template.generate(
+            files=_mount_files(inline_sources, parsed_files),
+            requirements=mount_requirements,
+            entrypoint=entrypoint,
+            livereload=livereload,
+            offline=offline_assets,
+            assets=manifest.get("assets", {}),
+            favicons=images.favicons if images is not None else [],
+            service_worker=SERVICE_WORKER_NAME if service_worker else None,
+            site_packages=site_packages_mount,
+            preload_hints=hints,
+            boot_timing=BOOT_TIMING_CHANNEL if boot_timing else None,
+        )
+        index_digest = write_chunks_if_changed(
+            os.path.join(build_dir, "index.html"), (chunk.encode() for chunk in rendered)
+        )
+    manifest["outputs"]["index.html"] = index_digest
+
+    profiler.begin("static_outputs")
+    write_if_changed(os.path.join(build_dir, "404.html"), _404_HTML)
+    manifest["outputs"]["404.html"] = sha256_bytes(_404_HTML.encode())
+
+    if fingerprint:
+        asset_manifest = json.dumps(manifest["assets"], indent=2, sort_keys=True) + "\n"
+        write_if_changed(os.path.join(build_dir, _ASSET_MANIFEST_NAME), asset_manifest)
+        manifest["outputs"][_ASSET_MANIFEST_NAME] = sha256_bytes(asset_manifest.encode())
+
+    profiler.begin("service_worker")
+    if service_worker:
+        write_service_worker(
+            build_dir,
+            manifest,
+            stlite_version=_STLITE_BROWSER_VERSION,
+            pyodide_version=_PYODIDE_VERSION,
+            pmotools_app_commit=_PMOTOOLS_APP_COMMIT,
+            requirements=build_requirements,
+            lock=pyodide_lock_index(_PYODIDE_VERSION),
+            offline=offline,
+        )
+    else:
+        retire_service_worker(build_dir, manifest, previous)
+
+    if precompress:
+        profiler.begin("precompress")
+        precompress_outputs(build_dir, manifest, reuse, jobs=jobs)
+
+    # Compare the payload with the previous build's; budgets are enforced once the
+    # manifest is saved.
+    size_violations = []
+    if size_report:
+        profiler.begin("size_report")
+        previous_report = load_report(build_dir)
+        report, warnings = build_size_report(
+            build_dir,
+            manifest,
+            inline_sources=inline_sources,
+            requirements=build_requirements,
+            lock=pyodide_lock_index(_PYODIDE_VERSION),
+            pyodide_version=_PYODIDE_VERSION,
+        )
+        for warning in warnings:
+            print(f"warning: {warning}", file=sys.stderr)
+        write_size_report(build_dir, manifest, report)
+        if size_budgets is None and BUDGETS_PATH.exists():
+            size_budgets = BUDGETS_PATH
+        if size_budgets:
+            size_violations = check_budgets(report, previous_report, load_budgets(size_budgets))
+        summary = format_markdown(
+            report, previous_report, diff_reports(previous_report, report), size_violations
+        )
+        print(summary)
+        if size_diff:
+            with open(size_diff, "a") as f:
+                f.write(summary + "\n")
 
-    # Render the template
-    rendered = template.render(files=parsed_files, requirements=requirements, entrypoint=entrypoint)
+    profiler.begin("finalize")
+    for rel_path in remove_stale_outputs(build_dir, previous, manifest):
+        print(f"removed stale {build_dir}/{rel_path}")
+    save_manifest(build_dir, manifest)
+    if size_violations:
+        raise ValueError("payload over budget: " + "; ".join(size_violations))
+    return profiler.report()
 
-    # Write the rendered template to the output file
-    os.makedirs(build_dir, exist_ok=True)
-    with open(os.path.join(build_dir, "index.html"), "w") as f:
-        f.write(rendered)
 
-    with open(os.path.join(build_dir, "404.html"), "w") as f:
-        f.write(_404_HTML)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build docs/ from the pmotools-app submodule.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Skip copying and rendering inputs whose content hashes match "
+            "docs/build-manifest.json from the previous build."
+        ),
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write Brotli (.br) and gzip (.gz) siblings of compressible files in docs/.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help=(
+            "Vendor @stlite/browser, the Pyodide runtime and the required wheels into "
+            "docs/assets/ (sha256-verified) so the site loads without CDNs or PyPI."
+        ),
+    )
+    parser.add_argument(
+        "--lazy-mount",
+        action="store_true",
+        help=(
+            "Inline only the entrypoint and its eager imports into index.html; "
+            "URL-mount the other app files from docs/app/."
+        ),
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help=(
+            "Name URL-mounted files after their content hash (PMO_logo.<hash>.png) "
+            "and write docs/asset-manifest.json, so they can be cached as immutable."
+        ),
+    )
+    parser.add_argument(
+        "--service-worker",
+        action="store_true",
+        help=(
+            "Write docs/sw.js, which precaches the build outputs and the Pyodide "
+            "packages the requirements need, and serves them cache-first."
+        ),
+    )
+    parser.add_argument(
+        "--optimize-images",
+        action="store_true",
+        help=(
+            "Recompress images/ losslessly, ship the smallest of PNG and --image-formats, "
+            "and add favicon renditions (needs Pillow)."
+        ),
+    )
+    parser.add_argument(
+        "--image-formats",
+        type=lambda value: tuple(fmt for fmt in value.split(",") if fmt),
+        default=DEFAULT_FORMATS,
+        help=(
+            f"Comma-separated formats to try besides PNG: {', '.join(IMAGE_FORMATS)} "
+            f"(default {','.join(DEFAULT_FORMATS)}; avif is lossy)."
+        ),
+    )
+    parser.add_argument(
+        "--image-budget",
+        type=int,
+        default=DEFAULT_BUDGET,
+        help=(
+            f"Fail --optimize-images if any image is larger than this many bytes "
+            f"(default {DEFAULT_BUDGET}; 0 disables)."
+        ),
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help=(
+            "Compile imported app modules for the Pyodide lockfile's Python and ship "
+            "them as one zip on sys.path (docs/app_bundle.zip)."
+        ),
+    )
+    parser.add_argument(
+        "--bundle-python",
+        help="Interpreter for --bundle (default: python<major>.<minor> on PATH).",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help=(
+            "Write per-phase wall time, bytes read/written and file counts as JSON "
+            "to PATH (stdout if omitted)."
+        ),
+    )
+    parser.add_argument(
+        "--columnar-data",
+        action="store_true",
+        help=(
+            "Also write example_data tables as Parquet, with example_data/columnar.json "
+            "and a pmo_columnar loader module (needs pyarrow; adds fastparquet)."
+        ),
+    )
+    parser.add_argument(
+        "--site-packages",
+        action="store_true",
+        help=(
+            "Resolve the PyPI requirements at build time and ship them as one "
+            "docs/site-packages.zip unpacked at boot, so micropip skips PyPI."
+        ),
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help=(
+            "Skip files excluded in [tool.pmo-build.minify] (pyproject.toml) and strip "
+            "comments, docstrings and indentation from inlined Python, keeping line numbers."
+        ),
+    )
+    parser.add_argument(
+        "--preload-hints",
+        action="store_true",
+        help=(
+            "Add preconnect/modulepreload/preload links for stlite, the Pyodide core "
+            "files and the lockfile wheels so they download while index.html parses."
+        ),
+    )
+    parser.add_argument(
+        "--boot-timing",
+        action="store_true",
+        help=(
+            "Record boot phase and first-import times as window.__pmoBootTimings and "
+            "log them to the browser console."
+        ),
+    )
+    parser.add_argument(
+        "--size-report",
+        action="store_true",
+        help=(
+            "Write docs/size-report.json (inlined sources, assets and lockfile wheel "
+            "bytes), compare it with the previous build's and enforce the size budgets."
+        ),
+    )
+    parser.add_argument(
+        "--size-budgets",
+        metavar="PATH",
+        help="Budgets for --size-report (default: size-budgets.json if it exists).",
+    )
+    parser.add_argument(
+        "--size-diff",
+        metavar="PATH",
+        help="Append the --size-report comparison as Markdown to PATH.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=(
+            f"Threads for reading, hashing, copying, image encoding and compression "
+            f"(default: CPU count, {DEFAULT_JOBS}). Output does not depend on it."
+        ),
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = parse_args()
     print(f"pmotools-app: {_PMOTOOLS_APP_COMMIT}")
     for warning in _requirement_warnings:
         print(f"warning: {warning}", file=sys.stderr)
-    build_site()
+    profile = build_site(
+        incremental=args.incremental,
+        precompress=args.precompress,
+        offline=args.offline,
+        lazy_mount=args.lazy_mount,
+        fingerprint=args.fingerprint,
+        service_worker=args.service_worker,
+        optimize_images=args.optimize_images,
+        image_formats=args.image_formats,
+        image_budget=args.image_budget or None,
+        bundle=args.bundle,
+        bundle_python=args.bundle_python,
+        jobs=args.jobs,
+        columnar_data=args.columnar_data,
+        site_packages=args.site_packages,
+        size_report=args.size_report,
+        size_budgets=args.size_budgets,
+        size_diff=args.size_diff,
+        minify=args.minify,
+        preload_hints=args.preload_hints,
+        boot_timing=args.boot_timing,
+    )
+    if args.profile == "-":
+        print(json.dumps(profile, indent=2))
+    elif args.profile:
+        with open(args.profile, "w") as f:
+            json.dump(profile, f, indent=2)
+            f.write("\n")
@@ -0,0 +1,292 @@
+"""
+Parquet copies of tabular example_data for ``build_site.py --columnar-data``.
+
+Inside Pyodide, ``pandas.read_csv`` runs the single-threaded WASM parser over every
+example table the walkthrough opens. With ``--columnar-data`` each CSV/TSV/TXT table
+in pmotools-app/example_data/ of at least ``MIN_SIZE`` bytes is parsed once at build
+time and also written as zstd-compressed Parquet
+(``example_data/<name>.parquet``, next to the original, which stays mounted for
+downloads). Column types follow what ``pandas.read_csv`` would infer: pandas' NA
+strings are nulls, integer columns with nulls become float64 and date-like text stays
+text.
+
+``example_data/columnar.json`` maps each original to its Parquet copy, delimiter,
+row count and column dtypes, and ``pmo_columnar.py`` (mounted at the app root)
+provides ``read_example_table()``, which loads the Parquet copy with fastparquet (the
+Parquet reader Pyodide ships; it is added to the requirements) and falls back to
+``read_csv``. Results are recorded under ``columnar`` in docs/build-manifest.json so
+incremental builds skip unchanged tables.
+
+Needs the optional ``pyarrow`` package at build time (``uv pip install pyarrow``).
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+
+from build_manifest import (
+    fingerprinted_path,
+    output_unchanged,
+    sha256_bytes,
+    write_if_changed,
+)
+from build_workers import map_ordered
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for --columnar-data
+    pa = None
+
+MANIFEST_NAME = "columnar.json"
+HELPER_NAME = "pmo_columnar.py"
+READER_PACKAGE = "fastparquet"
+TABULAR_EXTENSIONS = (".csv", ".tsv", ".txt")
+# Smaller tables parse instantly; a second copy isn't worth the request.
+MIN_SIZE = 16 * 1024
+COMPRESSION = "zstd"
+_SETTINGS = {"format": "parquet", "compression": COMPRESSION, "version": 3}
+
+# pandas.read_csv's default na_values.
+_PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+HELPER_SOURCE = '''"""
+Example data loader added by build_site.py --columnar-data.
+
+read_example_table("example_data/<name>.csv") returns the DataFrame pandas.read_csv
+gives for the original, loaded from its Parquet copy when the build made one.
+"""
+
+import json
+
+import pandas as pd
+
+_MANIFEST = "example_data/columnar.json"
+
+
+def read_example_table(path):
+    try:
+        with open(_MANIFEST) as f:
+            entry = json.load(f)["files"].get(path)
+    except (OSError, ValueError):
+        entry = None
+    if entry is None:
+        return pd.read_csv(path, sep=None, engine="python")
+    try:
+        return pd.read_parquet(entry["columnar"], engine="fastparquet")
+    except ImportError:
+        return pd.read_csv(path, sep=entry["delimiter"])
+'''
+
+
+def _delimiter(source_path: str) -> str | None:
+    """The table's delimiter, or None if it doesn't look like a table."""
+    with open(source_path, "r", errors="replace") as f:
+        header = f.readline()
+    if source_path.endswith(".csv") and "," in header:
+        return ","
+    for delimiter in ("\t", ","):
+        if delimiter in header:
+            return delimiter
+    return None
+
+
+def _read_table(source_path: str, delimiter: str, text_columns: list[str]):
+    return pa_csv.read_csv(
+        source_path,
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            null_values=_PANDAS_NA_VALUES,
+            strings_can_be_null=True,
+            true_values=["True", "TRUE", "true"],
+            false_values=["False", "FALSE", "false"],
+            column_types={name: pa.string() for name in text_columns},
+        ),
+    )
+
+
+def _pandas_table(source_path: str, delimiter: str):
+    """Parse like pandas.read_csv: no date inference, NA ints as float64."""
+    table = _read_table(source_path, delimiter, [])
+    temporal = [
+        field.name
+        for field in table.schema
+        if pa.types.is_temporal(field.type) or pa.types.is_decimal(field.type)
+    ]
+    if temporal:
+        table = _read_table(source_path, delimiter, temporal)
+    for index, field in enumerate(table.schema):
+        column = table.column(index)
+        if pa.types.is_null(field.type) or (
+            pa.types.is_integer(field.type) and column.null_count
+        ):
+            table = table.set_column(index, field.name, column.cast(pa.float64()))
+    # Columns without nulls are written as required, or fastparquet reads ints as float.
+    schema = pa.schema(
+        field.with_nullable(table.column(index).null_count > 0)
+        for index, field in enumerate(table.schema)
+    )
+    return table.cast(schema)
+
+
+def _pandas_dtype(arrow_type) -> str:
+    if pa.types.is_integer(arrow_type):
+        return "int64"
+    if pa.types.is_floating(arrow_type):
+        return "float64"
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    return "object"
+
+
+def _pandas_metadata(table) -> bytes:
+    """The ``pandas`` schema metadata pandas itself writes; readers take dtypes from it
+    (without it fastparquet returns nullable Int64 instead of int64)."""
+    columns = []
+    for field in table.schema:
+        dtype = _pandas_dtype(field.type)
+        columns.append(
+            {
+                "name": field.name,
+                "field_name": field.name,
+                "pandas_type": "unicode" if dtype == "object" else dtype,
+                "numpy_type": dtype,
+                "metadata": None,
+            }
+        )
+    return json.dumps(
+        {
+            "index_columns": [
+                {"kind": "range", "name": None, "start": 0, "stop": table.num_rows, "step": 1}
+            ],
+            "column_indexes": [],
+            "columns": columns,
+            "creator": {"library": "pyarrow", "version": pa.__version__},
+            "pandas_version": "2.0.0",
+        }
+    ).encode()
+
+
+def _convert(source_path: str, delimiter: str) -> tuple[bytes, dict]:
+    table = _pandas_table(source_path, delimiter)
+    table = table.replace_schema_metadata({b"pandas": _pandas_metadata(table)})
+    buffer = io.BytesIO()
+    # Data page v1: what fastparquet reads most reliably.
+    pq.write_table(
+        table,
+        buffer,
+        compression=COMPRESSION,
+        data_page_version="1.0",
+        use_dictionary=True,
+        write_statistics=False,
+    )
+    info = {
+        "rows": table.num_rows,
+        "columns": [
+            {"name": field.name, "type": str(field.type), "dtype": _pandas_dtype(field.type)}
+            for field in table.schema
+        ],
+    }
+    return buffer.getvalue(), info
+
+
+def is_tabular(filename: str) -> bool:
+    return filename.lower().endswith(TABULAR_EXTENSIONS)
+
+
+def convert_example_data(
+    build_dir: str,
+    manifest: dict,
+    reuse: dict,
+    *,
+    source_dir: str,
+    filenames: list[str],
+    virtual_prefix: str,
+    build_subdir: str,
+    fingerprint: bool = False,
+    jobs: int = 1,
+) -> list[dict]:
+    """Write Parquet copies, columnar.json and the helper; return their mount() entries.
+
+    Source hashes come from ``manifest["inputs"]``, so run this after the example data
+    itself was added. Tables are converted on up to ``jobs`` threads.
+    """
+    if pa is None:
+        raise RuntimeError("--columnar-data needs pyarrow (uv pip install pyarrow)")
+    previous = reuse.get("columnar", {})
+    manifest["columnar"] = {}
+    candidates = [
+        filename
+        for filename in filenames
+        if is_tabular(filename) and os.path.getsize(os.path.join(source_dir, filename)) >= MIN_SIZE
+    ]
+
+    def convert(filename: str) -> dict | None:
+        source_path = os.path.join(source_dir, filename)
+        digest = manifest["inputs"][source_path.replace(os.sep, "/")]
+        entry = previous.get(f"{virtual_prefix}/{filename}")
+        if (
+            entry is not None
+            and entry["source"] == digest
+            and entry["settings"] == _SETTINGS
+            and output_unchanged(build_dir, reuse, entry["path"], entry["sha256"])
+        ):
+            return entry
+        delimiter = _delimiter(source_path)
+        if delimiter is None:
+            return None
+        data, info = _convert(source_path, delimiter)
+        if len(info["columns"]) < 2:
+            return None
+        name = f"{os.path.splitext(filename)[0]}.parquet"
+        output_path = f"{build_subdir}/{name}"
+        if fingerprint:
+            output_path = fingerprinted_path(output_path, sha256_bytes(data))
+        write_if_changed(os.path.join(build_dir, output_path), data)
+        return {
+            "source": digest,
+            "source_size": os.path.getsize(source_path),
+            "settings": _SETTINGS,
+            "name": f"{virtual_prefix}/{name}",
+            "path": output_path,
+            "sha256": sha256_bytes(data),
+            "size": len(data),
+            "delimiter": delimiter,
+            **info,
+        }
+
+    mounted = []
+    files = {}
+    for filename, entry in zip(candidates, map_ordered(convert, candidates, jobs)):
+        if entry is None:
+            continue
+        virtual_path = f"{virtual_prefix}/{filename}"
+        manifest["columnar"][virtual_path] = entry
+        manifest["outputs"][entry["path"]] = entry["sha256"]
+        mounted.append({"name": entry["name"], "content": {"url": entry["path"]}})
+        files[virtual_path] = {
+            key: entry[key] for key in ("delimiter", "rows", "columns", "size", "source_size")
+        }
+        files[virtual_path]["columnar"] = entry["name"]
+
+    generated = {
+        f"{virtual_prefix}/{MANIFEST_NAME}": (
+            f"{build_subdir}/{MANIFEST_NAME}",
+            json.dumps({"files": files}, indent=2, sort_keys=True) + "\n",
+        ),
+        HELPER_NAME: (f"{build_subdir}/{HELPER_NAME}", HELPER_SOURCE),
+    }
+    for virtual_path, (output_path, text) in generated.items():
+        data = text.encode()
+        if fingerprint:
+            output_path = fingerprinted_path(output_path, sha256_bytes(data))
+        write_if_changed(os.path.join(build_dir, output_path), data)
+        manifest["outputs"][output_path] = sha256_bytes(data)
+        mounted.append({"name": virtual_path, "content": {"url": output_path}})
+    return mounted
@@ -0,0 +1,220 @@
+"""
+Pooled, concurrent HTTP GETs with an on-disk response cache.
+
+Used by ``scripts/sync_stlite_pins.py`` for its GitHub, raw.githubusercontent.com and
+npm lookups:
+
+- Connections are kept alive and reused per thread and host; ``map()`` fans requests
+  out to at most ``max_workers`` threads so bursts stay within rate limits.
+- Responses are cached under ``.download-cache/http/`` keyed by URL. Cached entries
+  are revalidated with ``If-None-Match`` / ``If-Modified-Since`` (a 304 costs no
+  GitHub rate limit); ``immutable=True`` entries (SHA-addressed raw URLs) are served
+  from disk without a request.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import http.client
+import json
+import os
+import threading
+import urllib.parse
+from pathlib import Path
+from typing import Self
+
+REPO_ROOT = Path(__file__).resolve().parent
+HTTP_CACHE_DIR = REPO_ROOT / ".download-cache" / "http"
+
+DEFAULT_MAX_WORKERS = 8
+_TIMEOUT = 60
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# Raised when a kept-alive connection was closed by the server between requests.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class CachedHTTPClient:
+    def __init__(
+        self,
+        *,
+        cache_dir: Path | None = HTTP_CACHE_DIR,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        headers: dict[str, str] | None = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.headers = headers or {}
+        self._local = threading.local()
+        # Every thread's connections, so close() can reach the pool's too.
+        self._connections: list[http.client.HTTPConnection] = []
+        self._connections_lock = threading.Lock()
+        self._pool: concurrent.futures.ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0}
+        self._stats_lock = threading.Lock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    # --- cache ---
+
+    def _cache_paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _read_cache(self, url: str) -> tuple[dict, bytes] | None:
+        if self.cache_dir is None:
+            return None
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("url") != url or meta.get("sha256") != hashlib.sha256(body).hexdigest():
+            return None
+        return meta, body
+
+    def _write_cache(
+        self, url: str, etag: str | None, last_modified: str | None, body: bytes, immutable: bool
+    ) -> None:
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "immutable": immutable,
+            "sha256": hashlib.sha256(body).hexdigest(),
+        }
+        meta_path, body_path = self._cache_paths(url)
+        # Body first: a reader only trusts a body whose hash the metadata records.
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode())):
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+    # --- connections ---
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get((scheme, netloc))
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = connections[(scheme, netloc)] = conn_class(netloc, timeout=_TIMEOUT)
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _drop_connection(self, scheme: str, netloc: str) -> None:
+        conn = self._local.connections.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _request(self, url: str, headers: dict[str, str]) -> tuple[int, http.client.HTTPMessage, bytes]:
+        parts = urllib.parse.urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        headers = {"User-Agent": "pmotool-app-web", **headers}
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                self._drop_connection(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+                continue
+            except OSError:
+                self._drop_connection(parts.scheme, parts.netloc)
+                raise
+            if response.will_close:
+                self._drop_connection(parts.scheme, parts.netloc)
+            self._count("requests")
+            return response.status, response.headers, body
+        raise AssertionError("unreachable")
+
+    # --- public API ---
+
+    def get(self, url: str, headers: dict[str, str] | None = None, *, immutable: bool = False) -> bytes:
+        """GET url; raises RuntimeError("HTTP <status> for <url>: ...") for non-2xx responses."""
+        cached = self._read_cache(url)
+        if cached is not None and cached[0].get("immutable"):
+            self._count("cache_hits")
+            return cached[1]
+
+        request_headers = {**self.headers, **(headers or {})}
+        if cached is not None:
+            meta = cached[0]
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        location = url
+        for _ in range(_MAX_REDIRECTS + 1):
+            status, response_headers, body = self._request(location, request_headers)
+            if status not in _REDIRECT_STATUSES:
+                break
+            location = urllib.parse.urljoin(location, response_headers["Location"])
+        else:
+            raise RuntimeError(f"Too many redirects for {url}")
+
+        if status == 304 and cached is not None:
+            self._count("not_modified")
+            meta, body = cached
+            if immutable:
+                self._write_cache(url, meta.get("etag"), meta.get("last_modified"), body, True)
+            return body
+        if not 200 <= status < 300:
+            text = body.decode("utf-8", errors="replace")[:500]
+            raise RuntimeError(f"HTTP {status} for {url}: {text}")
+        self._write_cache(
+            url, response_headers.get("ETag"), response_headers.get("Last-Modified"), body, immutable
+        )
+        return body
+
+    def _executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="http-fetch"
+                )
+            return self._pool
+
+    def submit(self, fn, *args) -> concurrent.futures.Future:
+        """Run fn(*args) on this client's bounded worker pool."""
+        return self._executor().submit(fn, *args)
+
+    def map(self, fn, iterable):
+        """Like Executor.map, on this client's bounded worker pool (results in order)."""
+        return self._executor().map(fn, iterable)
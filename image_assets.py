@@ -0,0 +1,233 @@
+"""
+Image stage for ``build_site.py --optimize-images``.
+
+Every PNG under pmotools-app/images/ is recompressed losslessly (Pillow ``optimize``)
+and, for each format in ``--image-formats`` (lossless WebP by default, AVIF on
+request), re-encoded; only the smallest encoding is written to docs/images/ and
+URL-mounted, and string literals in app sources that name the PNG by its mounted path
+are rewritten to it (``"images/PMO_logo.png"`` -> ``"images/PMO_logo.webp"``). The favicon source is also rendered at
+favicon/touch-icon sizes for ``template.jinja``.
+
+The build fails if any written image exceeds ``--image-budget`` bytes. Results are
+recorded in docs/build-manifest.json under ``images`` so incremental builds skip
+re-encoding unchanged sources.
+
+Needs the optional ``Pillow`` package (``uv sync --extra images``).
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import tokenize
+
+from build_manifest import (
+    fingerprinted_path,
+    output_unchanged,
+    sha256_bytes,
+    write_if_changed,
+)
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # optional: only needed for --optimize-images
+    Image = None
+
+IMAGE_FORMATS = ("webp", "avif")
+DEFAULT_FORMATS = ("webp",)
+DEFAULT_BUDGET = 128 * 1024
+FAVICON_SOURCE = "pmo_logo_mini.png"
+# (rel, square size in px); 180 px is the iOS home-screen icon.
+FAVICON_RENDITIONS = (("icon", 16), ("icon", 32), ("icon", 48), ("apple-touch-icon", 180))
+
+_SAVE_OPTIONS = {
+    "png": {"format": "PNG", "optimize": True},
+    # Lossless, so swapping the PNG for it changes no pixels.
+    "webp": {"format": "WEBP", "lossless": True, "quality": 100, "method": 6},
+    # Lossy: opt in with --image-formats webp,avif.
+    "avif": {"format": "AVIF", "quality": 80},
+}
+
+
+def _encode(image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, **_SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def _favicon(image, size: int) -> bytes:
+    canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    icon = ImageOps.contain(image.convert("RGBA"), (size, size), Image.Resampling.LANCZOS)
+    canvas.paste(icon, ((size - icon.width) // 2, (size - icon.height) // 2))
+    return _encode(canvas, "png")
+
+
+def _rewrite_string_literals(source: str, pattern: re.Pattern, repl) -> str:
+    """Apply pattern.sub(repl, ...) to the string literals of Python source."""
+    # f-strings are one STRING token before Python 3.12 and FSTRING_MIDDLE parts after.
+    string_types = {tokenize.STRING, getattr(tokenize, "FSTRING_MIDDLE", tokenize.STRING)}
+    line_offsets = [0]
+    for line in io.StringIO(source).readlines():
+        line_offsets.append(line_offsets[-1] + len(line))
+    try:
+        tokens = [
+            token
+            for token in tokenize.generate_tokens(io.StringIO(source).readline)
+            if token.type in string_types
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return source
+    parts = []
+    position = 0
+    for token in tokens:
+        start = line_offsets[token.start[0] - 1] + token.start[1]
+        end = line_offsets[token.end[0] - 1] + token.end[1]
+        parts += [source[position:start], pattern.sub(repl, source[start:end])]
+        position = end
+    parts.append(source[position:])
+    return "".join(parts)
+
+
+class ImageOptimizer:
+    """Writes optimized images for ``_add_url_mounted_assets`` and checks the budget."""
+
+    def __init__(
+        self,
+        build_dir: str,
+        manifest: dict,
+        reuse: dict,
+        *,
+        formats: tuple[str, ...] = DEFAULT_FORMATS,
+        budget: int | None = DEFAULT_BUDGET,
+        fingerprint: bool = False,
+    ):
+        if Image is None:
+            raise RuntimeError("--optimize-images needs Pillow (uv sync --extra images)")
+        unsupported = [fmt for fmt in formats if not features.check(fmt)]
+        if unsupported:
+            raise RuntimeError(f"this Pillow build cannot encode {', '.join(unsupported)}")
+        self.build_dir = build_dir
+        self.manifest = manifest
+        self.previous = reuse.get("images", {})
+        self.reuse = reuse
+        self.formats = tuple(formats)
+        self.budget = budget
+        self.fingerprint = fingerprint
+        # {"images/PMO_logo.png": "images/PMO_logo.webp"} for rewrite_references()
+        self.renamed: dict[str, str] = {}
+        self.favicons: list[dict] = []
+        manifest["images"] = {}
+
+    def handles(self, filename: str) -> bool:
+        return filename.lower().endswith(".png")
+
+    def _output_path(self, path: str, data: bytes) -> str:
+        return fingerprinted_path(path, sha256_bytes(data)) if self.fingerprint else path
+
+    def _encode_all(self, source_path: str, virtual_path: str) -> dict:
+        with Image.open(source_path) as image:
+            image.load()
+            candidates = {"png": _encode(image, "png")}
+            for fmt in self.formats:
+                candidates[fmt] = _encode(image, fmt)
+            favicons = []
+            if os.path.basename(virtual_path) == FAVICON_SOURCE:
+                stem = f"{os.path.dirname(virtual_path)}/favicon"
+                for rel, size in FAVICON_RENDITIONS:
+                    data = _favicon(image, size)
+                    path = self._output_path(f"{stem}-{size}.png", data)
+                    favicons.append(
+                        {"rel": rel, "sizes": f"{size}x{size}", "path": path, "data": data}
+                    )
+        fmt = min(candidates, key=lambda name: (len(candidates[name]), name != "png"))
+        data = candidates[fmt]
+        mounted = os.path.splitext(virtual_path)[0] + "." + fmt
+        return {
+            "format": fmt,
+            "name": mounted,
+            "path": self._output_path(mounted, data),
+            "data": data,
+            "favicons": favicons,
+        }
+
+    def _reusable(self, entry: dict | None, digest: str, settings: dict) -> bool:
+        if entry is None or entry["source"] != digest or entry["settings"] != settings:
+            return False
+        return all(
+            output_unchanged(self.build_dir, self.reuse, item["path"], item["sha256"])
+            for item in [entry] + entry["favicons"]
+        )
+
+    def encode(self, source_path: str, digest: str, virtual_path: str) -> dict:
+        """Write the optimized image (unless reusable) and return its manifest entry.
+
+        Images are written under the same relative path they are mounted at. Touches
+        no shared state, so images can be encoded on worker threads; pass the entries
+        to ``record()`` in a fixed order.
+        """
+        settings = {"formats": list(self.formats), "fingerprint": self.fingerprint}
+        entry = self.previous.get(virtual_path)
+        if self._reusable(entry, digest, settings):
+            return entry
+        encoded = self._encode_all(source_path, virtual_path)
+        for item in [encoded] + encoded["favicons"]:
+            data = item.pop("data")
+            write_if_changed(os.path.join(self.build_dir, item["path"]), data)
+            item["sha256"] = sha256_bytes(data)
+            item["size"] = len(data)
+        return {
+            "source": digest,
+            "source_size": os.path.getsize(source_path),
+            "settings": settings,
+            **encoded,
+        }
+
+    def record(self, virtual_path: str, entry: dict) -> tuple[str, str]:
+        """Add an ``encode()`` result to the manifest; return its (virtual path, URL)."""
+        self.manifest["images"][virtual_path] = entry
+        for item in [entry] + entry["favicons"]:
+            self.manifest["outputs"][item["path"]] = item["sha256"]
+        self.favicons.extend(
+            {"rel": item["rel"], "sizes": item["sizes"], "href": item["path"]}
+            for item in entry["favicons"]
+        )
+        if entry["name"] != virtual_path:
+            self.renamed[virtual_path] = entry["name"]
+        return entry["name"], entry["path"]
+
+    def rewrite_references(self, sources: dict[str, str]) -> dict[str, str]:
+        """Point ``.py`` sources at the formats the images were written in.
+
+        Only string literals are rewritten, and only where the mounted path
+        (``images/<name>``) starts after a quote or ``/`` and ends at a quote.
+        """
+        if not self.renamed:
+            return sources
+        pattern = re.compile(
+            r"(?<![^\"'/])("
+            + "|".join(re.escape(old) for old in sorted(self.renamed, key=len, reverse=True))
+            + r")(?![^\"'])"
+        )
+        rewritten = {}
+        for name, content in sources.items():
+            if name.endswith(".py"):
+                content = _rewrite_string_literals(
+                    content, pattern, lambda match: self.renamed[match.group(1)]
+                )
+            rewritten[name] = content
+        return rewritten
+
+    def check_budget(self) -> None:
+        if self.budget is None:
+            return
+        over = [
+            f"{item['path']} is {item['size']} bytes"
+            for entry in self.manifest["images"].values()
+            for item in [entry] + entry["favicons"]
+            if item["size"] > self.budget
+        ]
+        if over:
+            raise ValueError(
+                f"images over the {self.budget}-byte budget (--image-budget): " + "; ".join(over)
+            )
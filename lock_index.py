@@ -0,0 +1,118 @@
+"""
+Parsed, cached views of the lockfiles the stlite requirement resolver reads.
+
+- ``uv_lock_versions()``: pmotools-app/uv.lock parsed once with ``tomllib`` into a
+  ``{normalized name: version}`` table (re-read only when the file's mtime/size change).
+- ``load_lock_index()``: the fields the build uses from a Pyodide lockfile (name,
+  version, depends, file_name, sha256, imports, unvendored_tests) kept in a
+  ``marshal`` file next to the JSON. The index records the JSON's mtime, size and
+  sha256; a stat change triggers a hash check and the index is rebuilt only when the
+  content actually changed.
+
+Both return the same shape as the JSON lockfile (``{"info", "packages"}``), so
+``lock_closure()`` and ``pyodide_lock_versions()`` take either.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import marshal
+import os
+import re
+import tomllib
+from pathlib import Path
+
+INDEX_FORMAT = 1
+INDEX_SUFFIX = ".index"
+INDEX_FIELDS = ("name", "version", "depends", "file_name", "sha256", "imports", "unvendored_tests")
+
+
+def normalize_name(name: str) -> str:
+    """PEP 503 normalized project name (how the Pyodide lockfile keys packages)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=8)
+def _uv_lock_versions(path: Path, stat_key: tuple[int, int]) -> dict[str, str]:
+    data = tomllib.loads(path.read_text())
+    versions: dict[str, str] = {}
+    for package in data.get("package", []):
+        # Forked resolutions list a package more than once; keep the first, as uv does
+        # for the default environment.
+        if "version" in package:
+            versions.setdefault(normalize_name(package["name"]), package["version"])
+    return versions
+
+
+def uv_lock_versions(path: Path) -> dict[str, str]:
+    """Return {normalized name: version} for uv.lock at path ({} if it doesn't exist)."""
+    stat_key = _stat_key(path)
+    if stat_key is None:
+        return {}
+    return _uv_lock_versions(path, stat_key)
+
+
+def index_from_lock(lock: dict) -> dict:
+    """The indexed fields of a parsed Pyodide lockfile."""
+    return {
+        "info": lock.get("info", {}),
+        "packages": {
+            key: {field: package[field] for field in INDEX_FIELDS if field in package}
+            for key, package in lock.get("packages", {}).items()
+        },
+    }
+
+
+def index_path(lock_path: Path) -> Path:
+    return lock_path.with_name(lock_path.stem + INDEX_SUFFIX)
+
+
+def _read_index(path: Path) -> dict | None:
+    try:
+        index = marshal.loads(path.read_bytes())
+    except (FileNotFoundError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(index, dict) or index.get("format") != (INDEX_FORMAT, marshal.version):
+        return None
+    return index
+
+
+@functools.lru_cache(maxsize=8)
+def _load_lock_index(lock_path: Path, stat_key: tuple[int, int]) -> dict:
+    path = index_path(lock_path)
+    index = _read_index(path)
+    if index is not None and index["source"]["stat"] == list(stat_key):
+        return index["lock"]
+
+    data = lock_path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if index is None or index["source"]["sha256"] != digest:
+        index = {
+            "format": (INDEX_FORMAT, marshal.version),
+            "source": {"sha256": digest},
+            "lock": index_from_lock(json.loads(data)),
+        }
+    # Same content with a new mtime (checkout, touch): just refresh the stat.
+    index["source"]["stat"] = list(stat_key)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(marshal.dumps(index))
+    os.replace(tmp_path, path)
+    return index["lock"]
+
+
+def load_lock_index(lock_path: Path) -> dict | None:
+    """Return the index for the Pyodide lockfile JSON at lock_path (None if missing)."""
+    stat_key = _stat_key(lock_path)
+    if stat_key is None:
+        return None
+    return _load_lock_index(lock_path, stat_key)
@@ -0,0 +1,255 @@
+"""
+Smaller inlined app sources for ``build_site.py --minify``.
+
+Every app source is JSON-encoded into ``mount()`` in index.html, comments, docstrings
+and indentation included, so the browser parses and decodes all of it before stlite
+starts. With ``--minify``:
+
+- Files matching ``exclude`` in ``[tool.pmo-build.minify]`` of pyproject.toml
+  (``conftest.py``, ``main.py``, test modules, ...) are not shipped at all, unless
+  they also match ``include``. A pattern without ``/`` matches the file name in any
+  directory; the entrypoint is never excluded.
+- ``.py`` files lose their comments and their module, class and function
+  docstrings (a body that was only a docstring becomes ``pass``). Indentation drops
+  to one space per level, and the whitespace between tokens is dropped wherever the
+  tokens don't need it. Every statement stays on its original line, so traceback
+  line numbers still match pmotools-app. Files that mention ``__doc__`` keep their
+  docstrings.
+
+Each result is checked against the original: it must parse to the same AST (minus
+docstrings) with every statement on the same line, otherwise the file is shipped
+unchanged with a warning.
+"""
+
+from __future__ import annotations
+
+import ast
+import fnmatch
+import io
+import tokenize
+import tomllib
+
+from stlite_requirements import REPO_ROOT
+
+CONFIG_PATH = REPO_ROOT / "pyproject.toml"
+DEFAULT_CONFIG = {"exclude": [], "include": []}
+
+_SKIPPED_TOKENS = frozenset(
+    {
+        tokenize.COMMENT,
+        tokenize.NL,
+        tokenize.NEWLINE,
+        tokenize.INDENT,
+        tokenize.DEDENT,
+        tokenize.ENDMARKER,
+    }
+)
+_DOCSTRING_OWNERS = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def load_config() -> dict:
+    """``[tool.pmo-build.minify]`` from pyproject.toml, with defaults.
+
+    Returns ``DEFAULT_CONFIG`` when pyproject.toml or the table is missing.
+    """
+    try:
+        with open(CONFIG_PATH, "rb") as f:
+            tool = tomllib.load(f).get("tool", {}).get("pmo-build", {})
+    except FileNotFoundError:
+        return dict(DEFAULT_CONFIG)
+    if "minify" not in tool:
+        return dict(DEFAULT_CONFIG)
+    config = {**DEFAULT_CONFIG, **tool["minify"]}
+    unknown = sorted(set(config) - set(DEFAULT_CONFIG))
+    if unknown:
+        raise ValueError(
+            f"{CONFIG_PATH}: unknown [tool.pmo-build.minify] keys {', '.join(unknown)}"
+        )
+    return config
+
+
+def _matches(name: str, patterns: list[str]) -> bool:
+    base = name.rsplit("/", 1)[-1]
+    return any(
+        fnmatch.fnmatchcase(name if "/" in pattern else base, pattern) for pattern in patterns
+    )
+
+
+def is_excluded(name: str, config: dict) -> bool:
+    return _matches(name, config["exclude"]) and not _matches(name, config["include"])
+
+
+def _docstring_edits(tree: ast.Module, lines: list[str]) -> list[tuple[ast.Expr, str]]:
+    """Docstrings to drop, as (node, replacement); edits ``tree`` to match."""
+    edits = []
+    for owner in ast.walk(tree):
+        if not isinstance(owner, _DOCSTRING_OWNERS) or not owner.body:
+            continue
+        node = owner.body[0]
+        if not (
+            isinstance(node, ast.Expr)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            continue
+        start = lines[node.lineno - 1].encode()
+        end = lines[node.end_lineno - 1].encode()
+        own_line = not start[: node.col_offset].strip()
+        rest = end[node.end_col_offset:].strip()
+        if rest and not rest.startswith(b"#") and node.end_lineno != node.lineno:
+            continue  # '"""..."""; x = 1' across lines: leave it
+        replacement = "" if own_line and not rest and len(owner.body) > 1 else "pass"
+        edits.append((node, replacement))
+        if replacement:
+            owner.body[0] = ast.copy_location(ast.Pass(), node)
+        else:
+            del owner.body[0]
+    return edits
+
+
+def _strip_docstrings(lines: list[str], edits: list[tuple[ast.Expr, str]]) -> list[str]:
+    """Blank out each docstring's lines, keeping the line count."""
+    lines = list(lines)
+    for node, replacement in edits:
+        prefix = lines[node.lineno - 1].encode()[: node.col_offset].decode()
+        suffix = lines[node.end_lineno - 1].encode()[node.end_col_offset:].decode()
+        for index in range(node.lineno, node.end_lineno):
+            lines[index] = "\n"
+        if node.end_lineno != node.lineno:
+            suffix = "\n"  # only a comment can follow (see _docstring_edits)
+        lines[node.lineno - 1] = prefix + replacement + suffix
+    return lines
+
+
+def _needs_space(previous: tokenize.TokenInfo, text: str) -> bool:
+    """Whether two tokens would fuse without a space ('if x', '1 .real', "'' ''")."""
+    before, after = previous.string[-1:], text[:1]
+    if previous.type == tokenize.NUMBER and after == ".":
+        return True
+    if before in "'\"" and after in "'\"":
+        return True  # two strings would open a triple quote
+    return (before.isalnum() or before == "_") and (after.isalnum() or after == "_")
+
+
+def _minify_tokens(source: str) -> str:
+    """Re-emit the tokens without comments, with minimal indentation and spacing.
+
+    Each token starts on its original line: blank lines stay, and continuation lines
+    inside brackets lose their indentation.
+    """
+    lines = io.StringIO(source).readlines()
+    tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    out: list[str] = []
+    row = 1
+    depth = 0
+    brackets = 0
+    line_start = True
+    previous = None
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if token.type == tokenize.INDENT:
+            depth += 1
+        elif token.type == tokenize.DEDENT:
+            depth -= 1
+        elif token.type == tokenize.NEWLINE:
+            line_start = True
+        if token.type in _SKIPPED_TOKENS:
+            continue
+
+        end = token.end
+        if tokenize.tok_name[token.type].endswith("STRING_START"):
+            # Python 3.12+ splits f-strings into parts; copy the whole literal.
+            nesting = 1
+            while nesting:
+                part = tokens[index]
+                index += 1
+                part_name = tokenize.tok_name[part.type]
+                nesting += part_name.endswith("STRING_START") - part_name.endswith("STRING_END")
+            end = part.end
+        text = _source_span(lines, token.start, end)
+
+        if token.start[0] > row:
+            if not line_start and brackets == 0:
+                out.append(" \\")  # a backslash continuation
+            out.append("\n" * (token.start[0] - row))
+            previous = None
+        if line_start:
+            out.append(" " * depth)
+            line_start = False
+        elif previous is not None and _needs_space(previous, text):
+            out.append(" ")
+        out.append(text)
+        row = end[0]
+        previous = token._replace(string=text)
+        if token.type == tokenize.OP and text in ("(", "[", "{"):
+            brackets += 1
+        elif token.type == tokenize.OP and text in (")", "]", "}"):
+            brackets -= 1
+    return "".join(out) + "\n" if out else ""
+
+
+def _source_span(lines: list[str], start: tuple[int, int], end: tuple[int, int]) -> str:
+    (start_row, start_col), (end_row, end_col) = start, end
+    if start_row == end_row:
+        return lines[start_row - 1][start_col:end_col]
+    return (
+        lines[start_row - 1][start_col:]
+        + "".join(lines[start_row:end_row - 1])
+        + lines[end_row - 1][:end_col]
+    )
+
+
+def _statement_lines(tree: ast.AST) -> list[tuple[str, int]]:
+    return [
+        (type(node).__name__, node.lineno)
+        for node in ast.walk(tree)
+        if isinstance(node, ast.stmt)
+    ]
+
+
+def minify_python(source: str) -> str:
+    """Minified source with the same statements on the same lines.
+
+    Raises ValueError if the result doesn't match the original (see module docstring).
+    """
+    tree = ast.parse(source)
+    lines = io.StringIO(source).readlines()
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    edits = [] if "__doc__" in source else _docstring_edits(tree, lines)
+    minified = _minify_tokens("".join(_strip_docstrings(lines, edits)))
+    try:
+        result = ast.parse(minified)
+    except SyntaxError as e:
+        raise ValueError(f"minified source does not parse: {e}") from e
+    if ast.dump(result) != ast.dump(tree):
+        raise ValueError("minified source parses differently")
+    if _statement_lines(result) != _statement_lines(tree):
+        raise ValueError("minified source moves statements to other lines")
+    return minified
+
+
+def minify_sources(
+    sources: dict[str, str], *, entrypoint: str, config: dict
+) -> tuple[dict[str, str], dict]:
+    """Drop excluded files and minify the rest.
+
+    Returns (sources, report) where report is ``{"files": {name: [bytes before, bytes
+    after]}, "excluded": [names], "warnings": [messages]}``.
+    """
+    minified = {}
+    report = {"files": {}, "excluded": [], "warnings": []}
+    for name, content in sources.items():
+        if name != entrypoint and is_excluded(name, config):
+            report["excluded"].append(name)
+            continue
+        if name.endswith(".py"):
+            try:
+                content = minify_python(content)
+            except (SyntaxError, ValueError) as e:
+                report["warnings"].append(f"{name}: shipped unminified ({e})")
+        minified[name] = content
+        report["files"][name] = [len(sources[name].encode()), len(content.encode())]
+    return minified, report
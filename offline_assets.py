@@ -0,0 +1,317 @@
+"""
+Vendor @stlite/browser, the Pyodide runtime and the app's wheels into docs/assets/.
+
+``build_site.py --offline`` uses this so the site boots without cdn.jsdelivr.net or
+PyPI (air-gapped lab machines, slow third-party round trips):
+
+- ``assets/stlite/<version>/``: the ``build/`` directory of the @stlite/browser npm
+  tarball (stlite.js, stlite.css, chunks and stlite's own wheels), verified against
+  the registry's sha512 integrity.
+- ``assets/pyodide/v<version>/``: Pyodide core files, the cached lockfile as
+  ``pyodide-lock.json`` and every lockfile package the app needs (the resolved
+  requirements, their ``depends`` closure and micropip), each verified against the
+  lockfile ``sha256``.
+- ``assets/wheels/``: pure-Python wheels for requirements that are not in the
+  Pyodide lockfile (pmotools, fuzzywuzzy, openpyxl, ...) and their dependencies,
+  from PyPI at the version in pmotools-app/uv.lock, verified against PyPI's sha256.
+
+Downloads are cached by content hash under ``.download-cache/``.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import os
+import tarfile
+import urllib.error
+import urllib.request
+import zipfile
+
+from packaging.requirements import Requirement
+
+from build_manifest import output_unchanged, sha256_bytes, write_if_changed
+from stlite_requirements import (
+    REPO_ROOT,
+    STLITE_EXCLUDED,
+    lock_closure,
+    normalize_name,
+    package_name,
+    pyodide_cdn_base_url,
+    version_from_uv_lock,
+)
+
+DOWNLOAD_CACHE_DIR = REPO_ROOT / ".download-cache"
+
+# Files stlite's worker fetches from pyodideUrl's directory before any package.
+PYODIDE_CORE_FILES = (
+    "pyodide.js",
+    "pyodide.mjs",
+    "pyodide.asm.js",
+    "pyodide.asm.wasm",
+    "python_stdlib.zip",
+)
+PYODIDE_LOCK_FILE = "pyodide-lock.json"
+# Fetched by stlite's worker before any package, after the entry module.
+PYODIDE_BOOT_FILES = (
+    "pyodide.asm.js",
+    "pyodide.asm.wasm",
+    "python_stdlib.zip",
+    PYODIDE_LOCK_FILE,
+)
+# Loaded by Pyodide itself to install requirements.
+PYODIDE_BOOT_PACKAGES = ("micropip",)
+
+
+def _http_get(url: str) -> bytes:
+    try:
+        with urllib.request.urlopen(url, timeout=120) as resp:
+            return resp.read()
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"HTTP {e.code} for {url}") from e
+
+
+def cached_download(url: str, *, sha256: str | None = None, sha512: str | None = None) -> bytes:
+    """Download url (or read it from the cache) and verify it against the given digest."""
+    if sha256 is not None:
+        cache_path = DOWNLOAD_CACHE_DIR / f"sha256-{sha256}"
+    elif sha512 is not None:
+        cache_path = DOWNLOAD_CACHE_DIR / f"sha512-{sha512}"
+    else:
+        cache_path = None
+
+    if cache_path is not None and cache_path.exists():
+        return cache_path.read_bytes()
+    data = _http_get(url)
+    if sha256 is not None and hashlib.sha256(data).hexdigest() != sha256:
+        raise ValueError(f"sha256 mismatch for {url}")
+    if sha512 is not None and hashlib.sha512(data).hexdigest() != sha512:
+        raise ValueError(f"sha512 mismatch for {url}")
+    if cache_path is not None:
+        DOWNLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(data)
+    return data
+
+
+def pyodide_marker_environment(python_version: str) -> dict[str, str]:
+    """PEP 508 marker values inside Pyodide, for the lockfile's ``info.python``."""
+    return {
+        "implementation_name": "cpython",
+        "implementation_version": python_version,
+        "os_name": "posix",
+        "platform_machine": "wasm32",
+        "platform_python_implementation": "CPython",
+        "platform_system": "Emscripten",
+        "python_full_version": python_version,
+        "python_version": ".".join(python_version.split(".")[:2]),
+        "sys_platform": "emscripten",
+    }
+
+
+def wheel_requires_dist(wheel: bytes, environment: dict[str, str]) -> list[str]:
+    """Dependency names from a wheel's METADATA whose markers hold in environment.
+
+    Extras are never requested, so ``extra == ...`` requirements are dropped too.
+    """
+    with zipfile.ZipFile(io.BytesIO(wheel)) as zf:
+        metadata_name = next(
+            (n for n in zf.namelist() if n.endswith(".dist-info/METADATA")), None
+        )
+        if metadata_name is None:
+            return []
+        metadata = zf.read(metadata_name).decode("utf-8", errors="replace")
+    names = []
+    for line in metadata.splitlines():
+        if not line.startswith("Requires-Dist:"):
+            continue
+        req = Requirement(line[len("Requires-Dist:"):].strip())
+        if req.marker is None or req.marker.evaluate({**environment, "extra": ""}):
+            names.append(normalize_name(req.name))
+    return names
+
+
+def pypi_wheel(name: str, version: str) -> tuple[str, str, str]:
+    """Return (file name, url, sha256) of the pure-Python wheel for name==version on PyPI."""
+    release = json.loads(_http_get(f"https://pypi.org/pypi/{name}/{version}/json"))
+    for file in release.get("urls", []):
+        filename = file["filename"]
+        if file["packagetype"] == "bdist_wheel" and filename.endswith("-none-any.whl"):
+            return filename, file["url"], file["digests"]["sha256"]
+    raise LookupError(
+        f"No pure-Python wheel for {name}=={version} on PyPI; micropip cannot install it either."
+    )
+
+
+class _Vendor:
+    """Writes vendored files under docs/ and records them in the build manifest."""
+
+    def __init__(self, build_dir: str, manifest: dict, reuse: dict):
+        self.build_dir = build_dir
+        self.manifest = manifest
+        self.reuse = reuse
+
+    def have(self, rel_path: str, digest: str) -> bool:
+        if output_unchanged(self.build_dir, self.reuse, rel_path, digest):
+            self.manifest["outputs"][rel_path] = digest
+            return True
+        return False
+
+    def write(self, rel_path: str, data: bytes) -> str:
+        digest = sha256_bytes(data)
+        write_if_changed(os.path.join(self.build_dir, rel_path), data)
+        self.manifest["outputs"][rel_path] = digest
+        return digest
+
+
+def _vendor_stlite(vendor: _Vendor, stlite_version: str) -> str:
+    base = f"assets/stlite/{stlite_version}/"
+    previous = vendor.reuse.get("offline", {}).get("stlite", {})
+    if previous.get("version") == stlite_version and all(
+        vendor.have(rel_path, digest) for rel_path, digest in previous.get("files", {}).items()
+    ):
+        vendor.manifest["offline"]["stlite"] = previous
+        return base
+
+    meta = json.loads(_http_get(f"https://registry.npmjs.org/@stlite/browser/{stlite_version}"))
+    algorithm, _, encoded = meta["dist"]["integrity"].partition("-")
+    if algorithm != "sha512":
+        raise ValueError(f"Unexpected npm integrity algorithm {algorithm!r}")
+    tarball = cached_download(
+        meta["dist"]["tarball"], sha512=base64.b64decode(encoded).hex()
+    )
+
+    files = {}
+    with tarfile.open(fileobj=io.BytesIO(tarball), mode="r:gz") as tar:
+        for member in tar.getmembers():
+            if not member.isfile() or not member.name.startswith("package/build/"):
+                continue
+            rel_path = base + member.name[len("package/build/"):]
+            files[rel_path] = vendor.write(rel_path, tar.extractfile(member).read())
+    if f"{base}stlite.js" not in files:
+        raise LookupError(f"@stlite/browser@{stlite_version} tarball has no build/stlite.js")
+    vendor.manifest["offline"]["stlite"] = {"version": stlite_version, "files": files}
+    return base
+
+
+def _stlite_wheel_dependencies(
+    vendor: _Vendor, stlite_base: str, environment: dict[str, str]
+) -> list[str]:
+    """Dependencies declared by the streamlit/stlite wheels shipped in the npm package."""
+    names = []
+    for rel_path in vendor.manifest["offline"]["stlite"]["files"]:
+        if rel_path.startswith(stlite_base) and rel_path.endswith(".whl"):
+            with open(os.path.join(vendor.build_dir, rel_path), "rb") as f:
+                names.extend(wheel_requires_dist(f.read(), environment))
+    return names
+
+
+def vendor_offline_assets(
+    build_dir: str,
+    manifest: dict,
+    reuse: dict,
+    *,
+    stlite_version: str,
+    pyodide_version: str,
+    requirements: list[str],
+    lock: dict,
+) -> dict:
+    """
+    Vendor everything the page loads from third parties into docs/assets/.
+
+    Returns ``{"stlite_base", "pyodide_url", "requirements", "warnings"}`` where
+    requirements lists lockfile pins (loaded from the local pyodideUrl) and
+    docs-relative wheel paths for ``mount()``.
+    """
+    vendor = _Vendor(build_dir, manifest, reuse)
+    manifest["offline"] = {}
+    warnings: list[str] = []
+    packages = lock.get("packages", {})
+    environment = pyodide_marker_environment(lock["info"]["python"])
+
+    stlite_base = _vendor_stlite(vendor, stlite_version)
+
+    pyodide_base = f"assets/pyodide/v{pyodide_version}/"
+    for name in PYODIDE_CORE_FILES:
+        rel_path = pyodide_base + name
+        previous = reuse.get("outputs", {}).get(rel_path)
+        if previous is None or not vendor.have(rel_path, previous):
+            vendor.write(rel_path, cached_download(pyodide_cdn_base_url(pyodide_version) + name))
+    vendor.write(
+        pyodide_base + PYODIDE_LOCK_FILE, (json.dumps(lock, indent=2) + "\n").encode()
+    )
+
+    # Requirements not in the lockfile come from PyPI, pinned like the micropip list.
+    lock_names: list[str] = list(PYODIDE_BOOT_PACKAGES)
+    mount_requirements: list[str] = []
+    pending = []
+    for requirement in requirements:
+        name = normalize_name(package_name(requirement))
+        if name in packages:
+            lock_names.append(name)
+            mount_requirements.append(requirement)
+        else:
+            version = requirement.split("==", 1)[1] if "==" in requirement else version_from_uv_lock(name)
+            pending.append((name, version, True))
+    # streamlit's own dependencies, so micropip doesn't reach PyPI while installing it.
+    pending.extend(
+        (name, None, False)
+        for name in _stlite_wheel_dependencies(vendor, stlite_base, environment)
+    )
+
+    previous_wheels = reuse.get("offline", {}).get("wheels", {})
+    wheels = manifest["offline"]["wheels"] = {}
+    while pending:
+        name, version, direct = pending.pop(0)
+        if name in wheels or name in STLITE_EXCLUDED:
+            continue
+        if name in packages:
+            lock_names.append(name)
+            continue
+        version = version or version_from_uv_lock(name)
+        try:
+            if version is None:
+                raise LookupError(
+                    "not in the Pyodide lockfile or pmotools-app/uv.lock; "
+                    "micropip will fetch it from PyPI at runtime"
+                )
+            wheel = previous_wheels.get(name)
+            if (
+                wheel is None
+                or wheel["version"] != version
+                or not vendor.have(wheel["path"], wheel["sha256"])
+            ):
+                filename, url, sha256 = pypi_wheel(name, version)
+                wheel = {"path": f"assets/wheels/{filename}", "sha256": sha256, "version": version}
+                vendor.write(wheel["path"], cached_download(url, sha256=sha256))
+        except LookupError as e:
+            if direct:
+                raise
+            warnings.append(f"{name}: {e}")
+            continue
+        wheels[name] = wheel
+        mount_requirements.append(wheel["path"])
+        with open(os.path.join(build_dir, wheel["path"]), "rb") as f:
+            pending.extend(
+                (dep, None, False) for dep in wheel_requires_dist(f.read(), environment)
+            )
+
+    for name in lock_closure(lock, lock_names):
+        package = packages[name]
+        rel_path = pyodide_base + package["file_name"]
+        if not vendor.have(rel_path, package["sha256"]):
+            vendor.write(
+                rel_path,
+                cached_download(
+                    pyodide_cdn_base_url(pyodide_version) + package["file_name"],
+                    sha256=package["sha256"],
+                ),
+            )
+
+    return {
+        "stlite_base": stlite_base,
+        "pyodide_url": pyodide_base + "pyodide.js",
+        "requirements": mount_requirements,
+        "warnings": warnings,
+    }
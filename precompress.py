@@ -0,0 +1,108 @@
+"""
+Precompressed .br/.gz siblings for text-like files under docs/.
+
+``build_site.py --precompress`` writes ``<file>.br`` (Brotli, quality 11) and
+``<file>.gz`` (gzip -9, fixed mtime so output is reproducible) next to every
+compressible output and records them in docs/build-manifest.json under
+``precompressed``. ``simple_server.py`` serves the sibling that matches the request's
+Accept-Encoding, so nothing is compressed per request.
+
+Brotli output needs the optional ``brotli`` package (``uv pip install brotli``);
+without it only gzip siblings are written.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+
+from build_manifest import output_unchanged, sha256_bytes, write_if_changed
+from build_workers import map_ordered
+
+try:
+    import brotli
+except ImportError:  # optional: gzip-only precompression
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = frozenset(
+    {".css", ".csv", ".html", ".js", ".json", ".map", ".mjs", ".py", ".svg", ".tsv", ".txt", ".wasm", ".xml"}
+)
+# Served in preference order; suffixes must match simple_server.py.
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Below this the header overhead eats the savings.
+MIN_SIZE = 1024
+# Keep a variant only if it saves at least 10%.
+MAX_RATIO = 0.9
+
+
+def _compressors() -> dict:
+    compressors = {}
+    if brotli is not None:
+        compressors["br"] = lambda data: brotli.compress(data, quality=11)
+    compressors["gzip"] = lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    return compressors
+
+
+def is_compressible(rel_path: str) -> bool:
+    return os.path.splitext(rel_path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def _compress_output(
+    build_dir: str, reuse: dict, compressors: dict, rel_path: str, digest: str
+) -> dict | None:
+    """Write rel_path's compressed siblings (or reuse them); return its manifest entry."""
+    entry = reuse.get("precompressed", {}).get(rel_path)
+    if (
+        entry is not None
+        and output_unchanged(build_dir, reuse, rel_path, digest)
+        and entry["encodings"] == sorted(compressors)
+        and all(
+            output_unchanged(build_dir, reuse, variant["path"], variant["sha256"])
+            for variant in entry["variants"].values()
+        )
+    ):
+        return entry
+
+    with open(os.path.join(build_dir, rel_path), "rb") as f:
+        data = f.read()
+    if len(data) < MIN_SIZE:
+        return None
+    variants = {}
+    for encoding, compress in compressors.items():
+        blob = compress(data)
+        if len(blob) > len(data) * MAX_RATIO:
+            continue
+        variant_path = rel_path + ENCODING_SUFFIXES[encoding]
+        write_if_changed(os.path.join(build_dir, variant_path), blob)
+        variants[encoding] = {
+            "path": variant_path,
+            "sha256": sha256_bytes(blob),
+            "size": len(blob),
+        }
+    if not variants:
+        return None
+    return {"encodings": sorted(compressors), "size": len(data), "variants": variants}
+
+
+def precompress_outputs(build_dir: str, manifest: dict, reuse: dict, *, jobs: int = 1) -> None:
+    """Write compressed siblings for manifest outputs and record them in the manifest.
+
+    Outputs whose content and previous siblings are unchanged (per ``reuse``) are not
+    recompressed. Files are compressed on up to ``jobs`` threads.
+    """
+    compressors = _compressors()
+    precompressed = manifest.setdefault("precompressed", {})
+    outputs = [
+        (rel_path, digest)
+        for rel_path, digest in sorted(manifest["outputs"].items())
+        if is_compressible(rel_path)
+    ]
+    entries = map_ordered(
+        lambda output: _compress_output(build_dir, reuse, compressors, *output), outputs, jobs
+    )
+    for (rel_path, _), entry in zip(outputs, entries):
+        if entry is None:
+            continue
+        precompressed[rel_path] = entry
+        for variant in entry["variants"].values():
+            manifest["outputs"][variant["path"]] = variant["sha256"]
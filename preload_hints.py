@@ -0,0 +1,100 @@
+"""
+Resource hints for the stlite boot chain, for ``build_site.py --preload-hints``.
+
+Without hints the browser discovers the boot files one step at a time: index.html
+imports stlite.js, stlite starts Pyodide, Pyodide reads its lockfile, and only then
+does micropip fetch the wheels. The hints rendered into index.html's ``<head>`` let
+all of these downloads start while the HTML is still being parsed:
+
+- ``preconnect`` to cdn.jsdelivr.net (stlite and Pyodide), and to pypi.org and
+  files.pythonhosted.org when micropip still installs requirements from PyPI
+- ``modulepreload`` for stlite.js
+- ``preload`` (``as="fetch"``) for the Pyodide core files, the lockfile and the
+  ``file_name`` of every lockfile package in the requirements' ``depends`` closure
+  (plus micropip). With ``--site-packages`` the archive is included too.
+
+With ``--offline`` the hints point at the vendored copies under docs/assets/
+instead, including stlite's own wheels and the PyPI wheels. Pyodide runs in a web
+worker, so these preloads only warm the HTTP cache. Browsers may log that a preloaded
+file was "not used within a few seconds" of the load event.
+"""
+
+from __future__ import annotations
+
+from offline_assets import PYODIDE_BOOT_FILES, PYODIDE_BOOT_PACKAGES
+from stlite_requirements import (
+    lock_closure,
+    normalize_name,
+    package_name,
+    pyodide_cdn_base_url,
+)
+
+CDN_ORIGIN = "https://cdn.jsdelivr.net"
+PYPI_ORIGINS = ("https://pypi.org", "https://files.pythonhosted.org")
+_CDN_PYODIDE_ENTRY = "pyodide.mjs"
+
+
+def _preload(href: str) -> dict:
+    return {"rel": "preload", "href": href, "as": "fetch", "crossorigin": True}
+
+
+def boot_hints(
+    *,
+    stlite_version: str,
+    pyodide_version: str,
+    requirements: list[str],
+    lock: dict,
+    offline: dict | None = None,
+    outputs: dict | None = None,
+    site_packages_url: str | None = None,
+) -> list[dict]:
+    """``<link>`` attributes for index.html, in the order the boot chain needs them.
+
+    ``offline`` is the result of ``vendor_offline_assets`` and ``outputs`` the build
+    manifest's outputs; together they locate the vendored files.
+    """
+    packages = lock.get("packages", {})
+    names = list(PYODIDE_BOOT_PACKAGES) + [
+        normalize_name(package_name(requirement)) for requirement in requirements
+    ]
+    wheels = [packages[name]["file_name"] for name in lock_closure(lock, names)]
+    from_pypi = [
+        requirement
+        for requirement in requirements
+        if normalize_name(package_name(requirement)) not in packages
+    ]
+
+    hints = []
+    if offline is None:
+        hints.append({"rel": "preconnect", "href": CDN_ORIGIN, "crossorigin": True})
+        if from_pypi:
+            hints += [
+                {"rel": "preconnect", "href": origin, "crossorigin": True}
+                for origin in PYPI_ORIGINS
+            ]
+        stlite_base = f"{CDN_ORIGIN}/npm/@stlite/browser@{stlite_version}/build/"
+        hints.append({"rel": "modulepreload", "href": stlite_base + "stlite.js"})
+        pyodide_base = pyodide_cdn_base_url(pyodide_version)
+        hints += [
+            _preload(pyodide_base + name) for name in (_CDN_PYODIDE_ENTRY,) + PYODIDE_BOOT_FILES
+        ]
+        hints += [_preload(pyodide_base + file_name) for file_name in wheels]
+    else:
+        stlite_base = offline["stlite_base"]
+        pyodide_base = offline["pyodide_url"].rsplit("/", 1)[0] + "/"
+        hints.append({"rel": "modulepreload", "href": stlite_base + "stlite.js"})
+        hints += [
+            _preload(path) for path in (offline["pyodide_url"],) + tuple(
+                pyodide_base + name for name in PYODIDE_BOOT_FILES
+            )
+        ]
+        # Everything vendored was resolved for this build: stlite's wheels, the
+        # lockfile closure (including stlite's dependencies) and the PyPI wheels.
+        hints += [
+            _preload(path)
+            for path in sorted(outputs or {})
+            if path.endswith(".whl") and path.startswith((stlite_base, pyodide_base, "assets/wheels/"))
+        ]
+    if site_packages_url is not None:
+        hints.append(_preload(site_packages_url))
+    return hints
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Benchmark build_site.py against a synthetic pmotools-app tree.
+
+Generates a pmotools-app/ with --pages page scripts, --modules imported modules, JSON
+configs, images and --data-mb of example_data in a temporary directory, copies the
+build scripts next to it, then runs ``build_site.py --profile`` cold and once more
+with ``--incremental`` (warm, nothing changed). Each run's per-phase profile is
+appended to .benchmarks/build.jsonl and compared with the previous run of the same
+scenario, so a slower phase shows up before the CI rebuild does.
+
+Usage:
+  uv run python scripts/build_benchmark.py
+  uv run python scripts/build_benchmark.py --pages 500 --modules 200 --data-mb 200
+  uv run python scripts/build_benchmark.py --build-flags="--precompress --lazy-mount"
+  uv run python scripts/build_benchmark.py --fail-over 20   # exit 1 on a >20% slowdown
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS = REPO_ROOT / ".benchmarks" / "build.jsonl"
+# Build inputs besides the app: the minify config in pyproject.toml and the
+# --size-report budgets are read from the repo root too.
+BUILD_FILES = [
+    "template.jinja",
+    "pyproject.toml",
+    "size-budgets.json",
+    *(path.name for path in REPO_ROOT.glob("*.py")),
+]
+
+_PYPROJECT = """\
+[project]
+name = "pmotools-app"
+version = "0.0.0"
+dependencies = ["streamlit>=1.40", "pandas>=2.2", "openpyxl>=3.1"]
+"""
+_UV_LOCK = """\
+version = 1
+
+[[package]]
+name = "openpyxl"
+version = "3.1.5"
+
+[[package]]
+name = "pandas"
+version = "2.2.3"
+"""
+
+
+def _module_source(index: int, modules: int) -> str:
+    imports = "".join(
+        f"from src.mod_{dep:04d} import helper_{dep:04d}\n"
+        for dep in range(max(0, index - 2), index)
+    )
+    body = "".join(
+        f"\n\ndef func_{index:04d}_{n}(frame):\n"
+        f'    """Synthetic helper {n} of module {index} ({modules} modules)."""\n'
+        f"    return frame.groupby('locus')['reads'].sum() * {n}\n"
+        for n in range(20)
+    )
+    return f"import pandas as pd\n{imports}\n\ndef helper_{index:04d}():\n    return {index}\n{body}"
+
+
+def _page_source(index: int, modules: int) -> str:
+    module = index % max(modules, 1)
+    return (
+        "import streamlit as st\n"
+        f"from src.mod_{module:04d} import helper_{module:04d}\n\n"
+        f'st.title("Page {index}")\n'
+        f"st.write(helper_{module:04d}())\n"
+    )
+
+
+def generate_app(root: Path, *, pages: int, modules: int, data_mb: float, seed: int) -> None:
+    """Write a pmotools-app tree under root that build_site.py can build."""
+    rng = random.Random(seed)
+    app = root / "pmotools-app"
+    for directory in ("app_pages", "src", "conf", "images", "example_data"):
+        (app / directory).mkdir(parents=True, exist_ok=True)
+    (app / "pyproject.toml").write_text(_PYPROJECT)
+    (app / "uv.lock").write_text(_UV_LOCK)
+    (app / "src" / "__init__.py").write_text("")
+    for index in range(modules):
+        (app / "src" / f"mod_{index:04d}.py").write_text(_module_source(index, modules))
+    page_paths = []
+    for index in range(pages):
+        (app / "app_pages" / f"page_{index:04d}.py").write_text(_page_source(index, modules))
+        page_paths.append(f'st.Page("app_pages/page_{index:04d}.py")')
+    (app / "PMO_Builder.py").write_text(
+        "import streamlit as st\n\n"
+        f"st.navigation([{', '.join(page_paths)}]).run()\n"
+    )
+    for index in range(max(1, modules // 10)):
+        conf = {f"field_{n}": {"alias": f"f{n}", "required": n % 3 == 0} for n in range(50)}
+        (app / "conf" / f"conf_{index:04d}.json").write_text(json.dumps(conf, indent=2))
+
+    # Logos from docs/ if present, plus incompressible filler images.
+    for image in sorted((REPO_ROOT / "docs" / "images").glob("*.png")):
+        shutil.copy(image, app / "images" / image.name)
+    for index in range(10):
+        (app / "images" / f"figure_{index:02d}.png").write_bytes(rng.randbytes(64 * 1024))
+
+    # Example data: tab/comma separated tables split across a few files.
+    remaining = int(data_mb * 1024 * 1024)
+    index = 0
+    while remaining > 0:
+        suffix = ".tsv" if index % 2 else ".csv"
+        separator = "\t" if index % 2 else ","
+        rows = [separator.join(("sample", "locus", "reads", "frac"))]
+        size = 0
+        while size < min(remaining, 16 * 1024 * 1024):
+            row = separator.join(
+                (
+                    f"s{rng.randrange(400)}",
+                    f"L{rng.randrange(200)}",
+                    str(rng.randrange(10000)),
+                    f"{rng.random():.4f}",
+                )
+            )
+            rows.append(row)
+            size += len(row) + 1
+        (app / "example_data" / f"table_{index:02d}{suffix}").write_text("\n".join(rows) + "\n")
+        remaining -= size
+        index += 1
+
+
+def prepare_tree(root: Path) -> None:
+    """Copy the build scripts and cached Pyodide lockfiles next to the synthetic app."""
+    for name in BUILD_FILES:
+        if (REPO_ROOT / name).exists():
+            shutil.copy(REPO_ROOT / name, root / name)
+    lock_cache = REPO_ROOT / "pyodide-lock-cache"
+    if lock_cache.is_dir():
+        shutil.copytree(lock_cache, root / "pyodide-lock-cache")
+
+
+def run_build(root: Path, flags: list[str]) -> dict:
+    profile_path = root / "profile.json"
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "build_site.py", *flags, "--profile", str(profile_path)],
+        cwd=root,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    wall = time.perf_counter() - started
+    profile = json.loads(profile_path.read_text())
+    profile["total"]["process_seconds"] = round(wall, 6)
+    return profile
+
+
+def previous_result(scenario: dict) -> dict | None:
+    if not RESULTS.exists():
+        return None
+    match = None
+    for line in RESULTS.read_text().splitlines():
+        entry = json.loads(line)
+        if entry.get("scenario") == scenario:
+            match = entry
+    return match
+
+
+def compare(run: str, current: dict, previous: dict | None) -> float | None:
+    """Print the phases of one run against the previous result; return the total change %."""
+    before = {phase["phase"]: phase for phase in previous["phases"]} if previous else {}
+    print(f"{run}: {current['total']['seconds']:.3f}s in build_site(), "
+          f"{current['total']['process_seconds']:.3f}s process, "
+          f"peak RSS {current['total']['peak_rss_bytes'] / 1e6:.0f} MB")
+    for phase in current["phases"]:
+        line = f"  {phase['phase']:<22} {phase['seconds']:9.4f}s"
+        if phase["bytes_read"] is not None:
+            line += f"  read {phase['bytes_read'] / 1e6:8.2f} MB  wrote {phase['bytes_written'] / 1e6:8.2f} MB"
+        old = before.get(phase["phase"])
+        if old and old["seconds"] > 0:
+            line += f"  ({(phase['seconds'] - old['seconds']) / old['seconds']:+.0%})"
+        print(line)
+    if not previous:
+        return None
+    old_total = previous["total"]["seconds"]
+    return 100 * (current["total"]["seconds"] - old_total) / old_total if old_total else None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--pages", type=int, default=200, help="Page scripts (default 200).")
+    parser.add_argument("--modules", type=int, default=100, help="Imported modules (default 100).")
+    parser.add_argument("--data-mb", type=float, default=50, help="MB of example_data (default 50).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated data (default 0).")
+    parser.add_argument(
+        "--build-flags",
+        default="",
+        help='Extra build_site.py flags, joined with "=" (--build-flags="--minify --precompress").',
+    )
+    parser.add_argument(
+        "--fail-over",
+        type=float,
+        metavar="PERCENT",
+        help="Exit 1 if a run is more than PERCENT slower than the previous matching result.",
+    )
+    parser.add_argument("--no-record", action="store_true", help=f"Don't append to {RESULTS.relative_to(REPO_ROOT)}.")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated tree and print its path.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    flags = shlex.split(args.build_flags)
+    scenario = {
+        "pages": args.pages,
+        "modules": args.modules,
+        "data_mb": args.data_mb,
+        "seed": args.seed,
+        "build_flags": flags,
+    }
+    root = Path(tempfile.mkdtemp(prefix="pmo-build-bench-"))
+    try:
+        generate_app(root, pages=args.pages, modules=args.modules, data_mb=args.data_mb, seed=args.seed)
+        prepare_tree(root)
+        cold = run_build(root, flags)
+        warm = run_build(root, [*flags, "--incremental"])
+    finally:
+        if args.keep:
+            print(f"Synthetic tree kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    previous = previous_result(scenario)
+    print(f"Scenario: {json.dumps(scenario)}")
+    changes = [
+        compare("cold", cold, previous and previous["cold"]),
+        compare("warm (--incremental)", warm, previous and previous["warm"]),
+    ]
+    if not args.no_record:
+        RESULTS.parent.mkdir(exist_ok=True)
+        with RESULTS.open("a") as f:
+            entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "scenario": scenario, "cold": cold, "warm": warm}
+            f.write(json.dumps(entry) + "\n")
+    if args.fail_over is not None:
+        regressions = [change for change in changes if change is not None and change > args.fail_over]
+        if regressions:
+            print(f"Build slowed by {max(regressions):.0f}% (> {args.fail_over:g}%)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
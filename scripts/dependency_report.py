@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Report what each stlite requirement pulls in at boot, and what the app never imports.
+
+For every requirement resolved by stlite_requirements.py this prints the transitive
+closure through the Pyodide lockfile's ``depends`` graph with download bytes per
+package. Imports in the bundled app (PMO_Builder.py, app_pages/, src/) are scanned
+with ``ast``; packages that are reachable from the requirements but not needed by any
+import the app makes are flagged, heavy ones first, together with their ``-tests``
+siblings (unvendored test suites that must never be shipped).
+
+Download sizes come from, in order: files vendored by ``build_site.py --offline``
+under docs/assets/, the size cache pyodide-lock-cache/v<pyodide>.sizes.json, or
+HEAD requests to the Pyodide CDN with --fetch-sizes (which also updates the cache).
+
+Usage:
+  uv run python scripts/dependency_report.py
+  uv run python scripts/dependency_report.py --fetch-sizes --heavy-mb 0.5
+  uv run python scripts/dependency_report.py --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import re
+import sys
+import urllib.error
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BUILD_SITE = REPO_ROOT / "build_site.py"
+DOCS = REPO_ROOT / "docs"
+
+sys.path.insert(0, str(REPO_ROOT))
+from stlite_requirements import (
+    PMOTOOLS_APP,
+    STLITE_EXCLUDED,
+    lock_closure,
+    normalize_name,
+    package_name,
+    package_sizes,
+    pyodide_lock_index,
+    resolve_stlite_requirements,
+)
+
+# Bundled app code scanned for imports (relative to pmotools-app/).
+APP_SCAN_PATHS = ("PMO_Builder.py", "app_pages", "src")
+
+
+def read_current_pyodide_version() -> str:
+    match = re.search(r'_PYODIDE_VERSION\s*=\s*"([^"]+)"', BUILD_SITE.read_text())
+    if not match:
+        raise SystemExit("_PYODIDE_VERSION not found in build_site.py")
+    return match.group(1)
+
+
+def app_modules(app_dir: Path) -> list[Path]:
+    modules = []
+    for scan_path in APP_SCAN_PATHS:
+        path = app_dir / scan_path
+        if path.is_file():
+            modules.append(path)
+        elif path.is_dir():
+            modules.extend(sorted(path.rglob("*.py")))
+    return modules
+
+
+def top_level_imports(modules: list[Path]) -> dict[str, list[str]]:
+    """Return {top-level import name: [relative module paths importing it]}."""
+    local = {path.name for path in (PMOTOOLS_APP.iterdir() if PMOTOOLS_APP.is_dir() else [])}
+    imports: dict[str, list[str]] = {}
+    for module in modules:
+        tree = ast.parse(module.read_text(), filename=str(module))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                top = name.split(".", 1)[0]
+                if top in sys.stdlib_module_names or top in local or f"{top}.py" in local:
+                    continue
+                imports.setdefault(top, [])
+                rel_path = module.relative_to(PMOTOOLS_APP).as_posix()
+                if rel_path not in imports[top]:
+                    imports[top].append(rel_path)
+    return imports
+
+
+def build_report(pyodide_version: str, *, fetch_sizes: bool, heavy_bytes: int) -> dict:
+    lock = pyodide_lock_index(pyodide_version)
+    packages = lock["packages"]
+    requirements, _ = resolve_stlite_requirements(pyodide_version, lock=lock)
+
+    imports = top_level_imports(app_modules(PMOTOOLS_APP))
+    import_owner = {
+        imported: name for name, pkg in packages.items() for imported in pkg.get("imports", [])
+    }
+    imported_lock_packages = sorted(
+        {import_owner[name] for name in imports if name in import_owner}
+    )
+    used = set(lock_closure(lock, imported_lock_packages))
+
+    closures = {
+        requirement: lock_closure(lock, [package_name(requirement)])
+        for requirement in requirements
+    }
+    reachable = sorted({name for closure in closures.values() for name in closure})
+    requirement_names = {normalize_name(package_name(r)) for r in requirements}
+    imported_names = {normalize_name(name) for name in imports}
+    sizes = package_sizes(lock, pyodide_version, reachable, fetch=fetch_sizes, docs_dir=DOCS)
+
+    def tests_sibling(name: str) -> str | None:
+        sibling = f"{name}-tests"
+        return sibling if packages[name].get("unvendored_tests") and sibling in packages else None
+
+    unused = [
+        {
+            "package": name,
+            "bytes": sizes.get(name),
+            "heavy": sizes.get(name, 0) >= heavy_bytes,
+            "tests_sibling": tests_sibling(name),
+            "required_by": [r for r, closure in closures.items() if name in closure],
+        }
+        for name in reachable
+        if name not in used
+    ]
+    unused.sort(key=lambda item: (not item["heavy"], -(item["bytes"] or 0), item["package"]))
+
+    return {
+        "pyodide": pyodide_version,
+        "requirements": {
+            requirement: {
+                "in_lockfile": bool(closure),
+                "closure": closure,
+                "bytes": sum(sizes.get(name, 0) for name in closure),
+                "unknown_sizes": [name for name in closure if name not in sizes],
+            }
+            for requirement, closure in closures.items()
+        },
+        "total_bytes": sum(sizes.get(name, 0) for name in reachable),
+        "unknown_sizes": [name for name in reachable if name not in sizes],
+        "app_imports": imports,
+        "app_imports_outside_lockfile": sorted(
+            name for name in imports
+            if name not in import_owner
+            and normalize_name(name) not in STLITE_EXCLUDED
+            and normalize_name(name) not in requirement_names
+        ),
+        # e.g. openpyxl, which pandas.read_excel imports on demand
+        "requirements_not_imported": [
+            requirement for requirement, closure in closures.items()
+            if normalize_name(package_name(requirement)) not in imported_names
+            and not (set(closure) & used)
+        ],
+        "unused": unused,
+        "reachable_tests_packages": [name for name in reachable if name.endswith("-tests")],
+    }
+
+
+def format_bytes(size: int | None) -> str:
+    return "?" if size is None else f"{size / 1e6:.2f} MB"
+
+
+def print_report(report: dict) -> None:
+    print(f"Pyodide v{report['pyodide']} boot payload for stlite requirements:\n")
+    for requirement, info in report["requirements"].items():
+        if not info["in_lockfile"]:
+            print(f"  {requirement}: from PyPI (not in the Pyodide lockfile)")
+            continue
+        unknown = f" (sizes unknown: {len(info['unknown_sizes'])})" if info["unknown_sizes"] else ""
+        print(f"  {requirement}: {format_bytes(info['bytes'])}{unknown}")
+        print(f"    closure: {', '.join(info['closure'])}")
+    print(f"\nTotal lockfile download: {format_bytes(report['total_bytes'])}", end="")
+    if report["unknown_sizes"]:
+        print(f" (+{len(report['unknown_sizes'])} packages of unknown size; try --fetch-sizes)")
+    else:
+        print()
+
+    print("\nApp imports (PMO_Builder.py, app_pages/, src/):")
+    for name, modules in sorted(report["app_imports"].items()):
+        print(f"  {name}: {', '.join(modules)}")
+    if report["app_imports_outside_lockfile"]:
+        print(
+            "  not provided by the lockfile or a requirement: "
+            + ", ".join(report["app_imports_outside_lockfile"])
+        )
+
+    if report["requirements_not_imported"]:
+        print(
+            "  requirements never imported directly (optional backends?): "
+            + ", ".join(report["requirements_not_imported"])
+        )
+
+    if report["unused"]:
+        print("\nReachable but not needed by any app import (candidates to drop or lazy-load):")
+        for item in report["unused"]:
+            flag = "HEAVY " if item["heavy"] else ""
+            tests = f"; never ship {item['tests_sibling']}" if item["tests_sibling"] else ""
+            print(
+                f"  {flag}{item['package']}: {format_bytes(item['bytes'])}, "
+                f"via {', '.join(item['required_by'])}{tests}"
+            )
+    else:
+        print("\nEvery reachable lockfile package is needed by an app import.")
+    if report["reachable_tests_packages"]:
+        print(
+            "\nwarning: -tests packages are reachable: "
+            + ", ".join(report["reachable_tests_packages"])
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--pyodide-version",
+        help="Pyodide version (default: _PYODIDE_VERSION in build_site.py).",
+    )
+    parser.add_argument(
+        "--fetch-sizes",
+        action="store_true",
+        help="HEAD the Pyodide CDN for unknown package sizes and cache them.",
+    )
+    parser.add_argument(
+        "--heavy-mb",
+        type=float,
+        default=1.0,
+        help="Flag unused packages at least this many MB as heavy (default 1).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    pyodide_version = args.pyodide_version or read_current_pyodide_version()
+    report = build_report(
+        pyodide_version,
+        fetch_sizes=args.fetch_sizes,
+        heavy_bytes=int(args.heavy_mb * 1e6),
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except (LookupError, RuntimeError, ValueError, urllib.error.URLError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1) from e
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Measure what each app module pulls in at import time, and what that costs.
+
+Pyodide pays a page's imports on the main path of every page switch, so this runs the
+module-level imports of PMO_Builder.py, each app_pages/ script and each src/ module
+under CPython, each in a fresh subprocess:
+
+- with ``-X importtime`` (fastest of --repeat runs): cumulative import time, the
+  direct imports' cumulative times and the heaviest packages by self time summed
+  over their modules
+- with ``tracemalloc`` (a separate run, so tracing doesn't inflate the times): peak
+  memory allocated while importing
+
+Only top-level ``import``/``from`` statements (and ``try`` blocks that only import)
+are executed, not the rest of the page. An import whose names are only used inside
+functions is marked deferrable, with the time moving it into the function would
+take off the import.
+
+The imports run in a virtualenv (.import-cost-venv/ by default) with the requirements
+stlite_requirements.py resolves for the current Pyodide pins, plus streamlit at its
+pmotools-app/uv.lock version. The venv is built from a Python matching the Pyodide
+lockfile's major.minor when one is on PATH. Each run is appended to
+.benchmarks/import-cost.jsonl and compared with the previous one, so a submodule bump
+that makes a page heavier shows up here.
+
+Usage:
+  uv run python scripts/import_cost.py
+  uv run python scripts/import_cost.py --repeat 5 --top 15
+  uv run python scripts/import_cost.py --python python3.13 --json
+  uv run python scripts/import_cost.py --no-venv --python .venv/bin/python
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS = REPO_ROOT / ".benchmarks" / "import-cost.jsonl"
+DEFAULT_VENV = REPO_ROOT / ".import-cost-venv"
+_VENV_STAMP = "pmo-requirements.txt"
+_TIMEOUT_SECONDS = 300
+_MARKER = "--pmo-import-cost--"
+
+sys.path.insert(0, str(REPO_ROOT))
+from dependency_report import app_modules, read_current_pyodide_version
+
+from app_bundle import find_interpreter
+from stlite_requirements import (
+    PMOTOOLS_APP,
+    pmotools_app_commit_hash,
+    pyodide_lock_index,
+    resolve_stlite_requirements,
+    version_from_uv_lock,
+)
+
+# Runs in the subprocess: argv is (app dir, module path, "time" | "memory", statement
+# line numbers). Prints {"errors", "peak_bytes"} as the last line of stdout.
+_RUNNER = f"""\
+import ast, json, os, sys
+app_dir, rel_path, mode, lines = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4]
+os.chdir(app_dir)
+sys.path.insert(0, app_dir)
+with open(rel_path) as f:
+    tree = ast.parse(f.read(), rel_path)
+lines = {{int(line) for line in lines.split(",") if line}}
+name = rel_path[:-3].replace("/", ".").removesuffix(".__init__")
+namespace = {{
+    "__name__": name,
+    "__package__": name if rel_path.endswith("__init__.py") else name.rpartition(".")[0],
+    "__file__": os.path.abspath(rel_path),
+}}
+code = [
+    compile(ast.Module([node], []), rel_path, "exec")
+    for node in tree.body
+    if node.lineno in lines
+]
+if mode == "memory":
+    import tracemalloc
+    tracemalloc.start()
+else:
+    print({_MARKER!r}, file=sys.stderr, flush=True)
+errors = []
+for statement in code:
+    try:
+        exec(statement, namespace)
+    except Exception as e:
+        errors.append(f"{{type(e).__name__}}: {{e}}")
+result = {{"errors": errors, "peak_bytes": None}}
+if mode == "memory":
+    result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+print(json.dumps(result))
+"""
+
+
+def _is_import(node: ast.stmt) -> bool:
+    return isinstance(node, (ast.Import, ast.ImportFrom))
+
+
+def import_statements(tree: ast.Module) -> list[ast.stmt]:
+    """Module-level imports, and ``try`` blocks whose body only imports."""
+    return [
+        node
+        for node in tree.body
+        if _is_import(node) or (isinstance(node, ast.Try) and all(map(_is_import, node.body)))
+    ]
+
+
+class _References(ast.NodeVisitor):
+    """Names loaded at import time vs. only inside function bodies."""
+
+    def __init__(self):
+        self.module_level: set[str] = set()
+        self.in_functions: set[str] = set()
+        self.depth = 0
+
+    def visit_Name(self, node: ast.Name) -> None:
+        (self.in_functions if self.depth else self.module_level).add(node.id)
+
+    def _visit_body(self, node, body) -> None:
+        # Decorators, defaults and annotations are evaluated when the def runs.
+        for decorator in getattr(node, "decorator_list", []):
+            self.visit(decorator)
+        self.visit(node.args)
+        if getattr(node, "returns", None) is not None:
+            self.visit(node.returns)
+        self.depth += 1
+        for child in body:
+            self.visit(child)
+        self.depth -= 1
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_body(node, node.body)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self._visit_body(node, [node.body])
+
+
+def _bindings(node: ast.Import | ast.ImportFrom) -> list[tuple[str, list[str]]]:
+    """(bound name, modules the statement may import) pairs; ``*`` imports are skipped."""
+    if isinstance(node, ast.Import):
+        return [(alias.asname or alias.name.split(".", 1)[0], [alias.name]) for alias in node.names]
+    if node.module == "__future__" or node.level:
+        return []
+    return [
+        (alias.asname or alias.name, [node.module, f"{node.module}.{alias.name}"])
+        for alias in node.names
+        if alias.name != "*"
+    ]
+
+
+def deferrable_imports(tree: ast.Module) -> list[dict]:
+    """Top-level imports whose names are only used inside functions."""
+    references = _References()
+    references.visit(tree)
+    deferrable = []
+    for node in tree.body:
+        if not _is_import(node):
+            continue
+        bindings = _bindings(node)
+        names = [name for name, _ in bindings]
+        if (
+            bindings
+            and not set(names) & references.module_level
+            and set(names) & references.in_functions
+        ):
+            deferrable.append(
+                {
+                    "line": node.lineno,
+                    "names": names,
+                    "modules": sorted({module for _, modules in bindings for module in modules}),
+                }
+            )
+    return deferrable
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """``-X importtime`` entries after the runner's marker, in the order printed."""
+    entries = []
+    lines = stderr.split(_MARKER + "\n", 1)[-1].splitlines()
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|", 2)
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+        name = fields[2][1:]
+        entries.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_us": int(fields[0]),
+                "cumulative_us": int(fields[1]),
+            }
+        )
+    return entries
+
+
+def _run(python: str, rel_path: str, mode: str, lines: list[int]) -> tuple[dict, str]:
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    args = [python, "-X", "importtime", "-c", _RUNNER] if mode == "time" else [python, "-c", _RUNNER]
+    result = subprocess.run(
+        [*args, str(PMOTOOLS_APP), rel_path, mode, ",".join(map(str, lines))],
+        check=False,
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=_TIMEOUT_SECONDS,
+    )
+    output = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not output:
+        raise RuntimeError(f"{rel_path}: import run failed\n{result.stderr[-2000:]}")
+    return json.loads(output[-1]), result.stderr
+
+
+def measure_module(python: str, path: Path, *, repeat: int, top: int) -> dict:
+    rel_path = path.relative_to(PMOTOOLS_APP).as_posix()
+    tree = ast.parse(path.read_text(), filename=str(path))
+    lines = [node.lineno for node in import_statements(tree)]
+
+    best = None
+    for _ in range(repeat):
+        outcome, stderr = _run(python, rel_path, "time", lines)
+        entries = parse_importtime(stderr)
+        total = sum(entry["cumulative_us"] for entry in entries if entry["depth"] == 0)
+        if best is None or total < best[0]:
+            best = (total, entries, outcome)
+    total_us, entries, outcome = best
+    memory, _ = _run(python, rel_path, "memory", lines)
+
+    direct = {
+        entry["module"]: entry["cumulative_us"] / 1000 for entry in entries if entry["depth"] == 0
+    }
+    packages: dict[str, float] = {}
+    for entry in entries:
+        top_level = entry["module"].split(".", 1)[0]
+        packages[top_level] = packages.get(top_level, 0) + entry["self_us"] / 1000
+    deferrable = deferrable_imports(tree)
+    for item in deferrable:
+        # Only what this import loaded first; modules already loaded cost nothing here.
+        item["ms"] = round(sum(direct.get(module, 0) for module in item["modules"]), 3)
+    return {
+        "total_ms": round(total_us / 1000, 3),
+        "peak_bytes": memory["peak_bytes"],
+        "modules_imported": len(entries),
+        "direct": {name: round(ms, 3) for name, ms in sorted(direct.items(), key=lambda item: -item[1])},
+        "heaviest_packages": {
+            name: round(ms, 3)
+            for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+        "deferrable": deferrable,
+        "errors": outcome["errors"],
+    }
+
+
+def requirement_pins(pyodide_version: str) -> list[str]:
+    requirements, _ = resolve_stlite_requirements(pyodide_version)
+    streamlit = version_from_uv_lock("streamlit")
+    return [f"streamlit=={streamlit}" if streamlit else "streamlit", *requirements]
+
+
+def ensure_venv(venv: Path, python: str, pins: list[str]) -> str:
+    """Create or update venv with pins; return its interpreter."""
+    venv_python = venv / "bin" / "python"
+    stamp = venv / _VENV_STAMP
+    wanted = f"# {python}\n" + "\n".join(pins) + "\n"
+    if venv_python.exists() and stamp.exists() and stamp.read_text() == wanted:
+        return str(venv_python)
+    print(f"Installing {', '.join(pins)} into {venv}", file=sys.stderr)
+    subprocess.run([python, "-m", "venv", "--clear", str(venv)], check=True)
+    subprocess.run(
+        [str(venv_python), "-m", "pip", "install", "--quiet", "--disable-pip-version-check", *pins],
+        check=True,
+    )
+    stamp.write_text(wanted)
+    return str(venv_python)
+
+
+def previous_result() -> dict | None:
+    if not RESULTS.exists():
+        return None
+    lines = RESULTS.read_text().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def _change(current: float | None, before: float | None) -> str:
+    if current is None or not before:
+        return ""
+    return f" ({(current - before) / before:+.0%})"
+
+
+def print_report(report: dict, previous: dict | None) -> None:
+    print(
+        f"Import cost under Python {report['python']} for pmotools-app "
+        f"{report['pmotools_app_commit']} (fastest of {report['repeat']} runs):"
+    )
+    if previous:
+        print(f"compared with {previous['time']} (pmotools-app {previous['pmotools_app_commit']})")
+        if previous["requirements"] != report["requirements"]:
+            print("  requirements changed since then")
+    before = previous["modules"] if previous else {}
+    modules = sorted(report["modules"].items(), key=lambda item: -item[1]["total_ms"])
+    for rel_path, info in modules:
+        old = before.get(rel_path, {})
+        peak = info["peak_bytes"]
+        print(
+            f"\n  {rel_path}: {info['total_ms']:.1f} ms{_change(info['total_ms'], old.get('total_ms'))}, "
+            f"peak {peak / 1e6:.1f} MB{_change(peak, old.get('peak_bytes'))}, "
+            f"{info['modules_imported']} modules"
+        )
+        if info["direct"]:
+            print("    direct: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in info["direct"].items()))
+        if info["heaviest_packages"]:
+            print(
+                "    heaviest: "
+                + ", ".join(f"{name} {ms:.1f} ms" for name, ms in info["heaviest_packages"].items())
+            )
+        for item in info["deferrable"]:
+            print(
+                f"    deferrable (line {item['line']}, only used in functions): "
+                f"{', '.join(item['names'])}, {item['ms']:.1f} ms"
+            )
+        for error in info["errors"]:
+            print(f"    error: {error}")
+    removed = sorted(set(before) - set(report["modules"]))
+    if removed:
+        print(f"\n  no longer present: {', '.join(removed)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--python",
+        help="Interpreter to build the venv from (default: python3.X matching Pyodide, if on PATH).",
+    )
+    parser.add_argument(
+        "--venv",
+        type=Path,
+        default=DEFAULT_VENV,
+        help=f"Virtualenv with the resolved requirements (default {DEFAULT_VENV.relative_to(REPO_ROOT)}).",
+    )
+    parser.add_argument(
+        "--no-venv",
+        action="store_true",
+        help="Import with --python as is, without installing the requirements.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per module (default 3).")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest packages per module (default 10).")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    parser.add_argument("--no-record", action="store_true", help=f"Don't append to {RESULTS.relative_to(REPO_ROOT)}.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    pyodide_version = read_current_pyodide_version()
+    pins = requirement_pins(pyodide_version)
+    if args.no_venv:
+        python = args.python or sys.executable
+    else:
+        try:
+            base = find_interpreter(pyodide_lock_index(pyodide_version)["info"]["python"], args.python)
+        except RuntimeError:
+            if args.python:
+                raise
+            base = sys.executable
+            print(
+                f"warning: no Python matching Pyodide's on PATH; using {base}",
+                file=sys.stderr,
+            )
+        python = ensure_venv(args.venv, base, pins)
+    version = subprocess.run(
+        [python, "-c", "import platform; print(platform.python_version())"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pmotools_app_commit": pmotools_app_commit_hash(),
+        "python": version,
+        "requirements": pins,
+        "repeat": args.repeat,
+        "modules": {
+            path.relative_to(PMOTOOLS_APP).as_posix(): measure_module(
+                python, path, repeat=args.repeat, top=args.top
+            )
+            for path in app_modules(PMOTOOLS_APP)
+        },
+    }
+    previous = previous_result()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, previous)
+    if not args.no_record:
+        RESULTS.parent.mkdir(exist_ok=True)
+        with RESULTS.open("a") as f:
+            f.write(json.dumps(report) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except (LookupError, RuntimeError, ValueError, urllib.error.URLError, subprocess.SubprocessError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1) from e
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Load-test simple_server.py (or any host) with the files in docs/.
+
+Each worker thread holds one HTTP/1.1 keep-alive connection and requests the
+site's files round-robin (index.html, 404.html, images/, example_data/, ...).
+Prints requests/sec, latency percentiles and bytes received.
+
+Usage:
+  uv run python scripts/load_test.py                       # start a --production server on docs/
+  uv run python scripts/load_test.py --url http://lab-host:8000 --concurrency 64 --duration 30
+  uv run python scripts/load_test.py --server-args ""      # compare with the default server
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SIMPLE_SERVER = REPO_ROOT / "simple_server.py"
+DOCS = REPO_ROOT / "docs"
+
+
+def site_paths(docs_dir: Path) -> list[str]:
+    """URL paths for every servable file under docs_dir, index first."""
+    paths = ["/"]
+    for path in sorted(docs_dir.rglob("*")):
+        if not path.is_file() or any(part.startswith(".") for part in path.relative_to(docs_dir).parts):
+            continue
+        paths.append("/" + urllib.parse.quote(path.relative_to(docs_dir).as_posix()))
+    return paths
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server on {host}:{port} did not start within {timeout}s")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(round(fraction * (len(sorted_values) - 1)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_worker(
+    host: str,
+    port: int,
+    paths: list[str],
+    offset: int,
+    deadline: float,
+    results: list,
+) -> None:
+    latencies: list[float] = []
+    errors = 0
+    received = 0
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    i = offset
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            body = resp.read()
+            if resp.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - started)
+        received += len(body)
+    conn.close()
+    results.append((latencies, errors, received))
+
+
+def load_test(host: str, port: int, paths: list[str], *, concurrency: int, duration: float) -> dict:
+    results: list = []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            args=(host, port, paths, n, deadline, results),
+            daemon=True,
+        )
+        for n in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for worker, _, _ in results for latency in worker)
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors, _ in results),
+        "bytes": sum(received for _, _, received in results),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, fraction) * 1000, 2)
+            for name, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("max", 1.0))
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--url",
+        help="Test an already running server instead of starting simple_server.py.",
+    )
+    parser.add_argument("--docs", type=Path, default=DOCS, help="Site directory (default docs/).")
+    parser.add_argument("--concurrency", type=int, default=32, help="Parallel connections.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run.")
+    parser.add_argument(
+        "--server-args",
+        default="--production",
+        help='Extra simple_server.py arguments (default "--production").',
+    )
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    paths = site_paths(args.docs)
+    server = None
+    if args.url:
+        parsed = urllib.parse.urlsplit(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        server = subprocess.Popen(
+            [sys.executable, str(SIMPLE_SERVER), str(args.docs), str(port), *shlex.split(args.server_args)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        )
+    try:
+        wait_for_port(host, port)
+        result = load_test(host, port, paths, concurrency=args.concurrency, duration=args.duration)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result["files"] = len(paths)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        latency = result["latency_ms"]
+        print(f"{result['requests']} requests over {result['files']} files in {result['duration_s']}s "
+              f"({result['concurrency']} connections)")
+        print(f"  {result['requests_per_s']} req/s, {result['bytes'] / 1e6:.1f} MB received, "
+              f"{result['errors']} errors")
+        print(f"  latency p50 {latency['p50']} ms, p90 {latency['p90']} ms, "
+              f"p99 {latency['p99']} ms, max {latency['max']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,6 +14,9 @@ Usage:
   uv run python scripts/sync_stlite_pins.py --pyodide-version 0.29.3 --dry-run
 
 Requires network access. Optional: GITHUB_TOKEN for higher GitHub API rate limits.
+Responses are cached under .download-cache/http/ (see http_cache.py): commit pages
+and npm metadata are revalidated with ETags, SHA-addressed raw files are never
+re-fetched.
 """
 
 from __future__ import annotations
@@ -24,7 +27,6 @@ import os
 import re
 import sys
 import urllib.error
-import urllib.request
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -32,8 +34,10 @@ BUILD_SITE = REPO_ROOT / "build_site.py"
 TEMPLATE = REPO_ROOT / "template.jinja"
 
 sys.path.insert(0, str(REPO_ROOT))
-from stlite_requirements import (  # noqa: E402
+from http_cache import DEFAULT_MAX_WORKERS, HTTP_CACHE_DIR, CachedHTTPClient
+from stlite_requirements import (
     fetch_pyodide_lock,
+    pyodide_lock_index,
     pyodide_lock_url,
     resolve_stlite_requirements,
 )
@@ -48,16 +52,6 @@ STLITE_CDN_RE = re.compile(
 )
 
 
-def http_get(url: str, headers: dict[str, str] | None = None) -> bytes:
-    req = urllib.request.Request(url, headers=headers or {})
-    try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            return resp.read()
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace")[:500]
-        raise RuntimeError(f"HTTP {e.code} for {url}: {body}") from e
-
-
 def github_headers() -> dict[str, str]:
     headers = {"Accept": "application/vnd.github+json"}
     token = os.environ.get("GITHUB_TOKEN")
@@ -66,14 +60,27 @@ def github_headers() -> dict[str, str]:
     return headers
 
 
-def fetch_latest_stlite_browser_version() -> str:
+def fetch_latest_stlite_browser_version(client: CachedHTTPClient) -> str:
     data = json.loads(
-        http_get("https://registry.npmjs.org/@stlite%2fbrowser/latest")
+        client.get("https://registry.npmjs.org/@stlite%2fbrowser/latest")
     )
     return data["version"]
 
 
-def find_stlite_commit_for_browser_version(version: str, max_pages: int = 10) -> str:
+def _browser_package_version(client: CachedHTTPClient, sha: str) -> str | None:
+    raw_url = (
+        f"https://raw.githubusercontent.com/{STLITE_REPO}/"
+        f"{sha}/packages/browser/package.json"
+    )
+    try:
+        return json.loads(client.get(raw_url, immutable=True)).get("version")
+    except RuntimeError:
+        return None
+
+
+def find_stlite_commit_for_browser_version(
+    client: CachedHTTPClient, version: str, max_pages: int = 10
+) -> str:
     """Return a git SHA where packages/browser/package.json matches version."""
     headers = github_headers()
     for page in range(1, max_pages + 1):
@@ -81,21 +88,20 @@ def find_stlite_commit_for_browser_version(version: str, max_pages: int = 10) ->
             f"https://api.github.com/repos/{STLITE_REPO}/commits"
             f"?path=packages/browser/package.json&per_page=100&page={page}"
         )
-        commits = json.loads(http_get(url, headers))
+        commits = json.loads(client.get(url, headers))
         if not commits:
             break
-        for commit in commits:
-            sha = commit["sha"]
-            raw_url = (
-                f"https://raw.githubusercontent.com/{STLITE_REPO}/"
-                f"{sha}/packages/browser/package.json"
-            )
-            try:
-                pkg = json.loads(http_get(raw_url))
-            except RuntimeError:
-                continue
-            if pkg.get("version") == version:
-                return sha
+        # Fetch the page's package.json files concurrently; check them newest first
+        # and drop the fetches still queued once one matches.
+        shas = [commit["sha"] for commit in commits]
+        futures = [client.submit(_browser_package_version, client, sha) for sha in shas]
+        try:
+            for sha, future in zip(shas, futures):
+                if future.result() == version:
+                    return sha
+        finally:
+            for future in futures:
+                future.cancel()
     raise LookupError(
         f"Could not find stlite commit for @stlite/browser@{version} "
         f"(searched {max_pages} pages of commits). "
@@ -104,12 +110,12 @@ def find_stlite_commit_for_browser_version(version: str, max_pages: int = 10) ->
     )
 
 
-def pyodide_version_from_stlite_commit(sha: str) -> str:
+def pyodide_version_from_stlite_commit(client: CachedHTTPClient, sha: str) -> str:
     raw_url = (
         f"https://raw.githubusercontent.com/{STLITE_REPO}/"
         f"{sha}/packages/kernel/src/worker.ts"
     )
-    text = http_get(raw_url).decode("utf-8")
+    text = client.get(raw_url, immutable=True).decode("utf-8")
     match = PYODIDE_URL_RE.search(text)
     if not match:
         raise LookupError(f"No Pyodide CDN URL in worker.ts at commit {sha}")
@@ -177,10 +183,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Run build_site.py after updating pins.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Concurrent HTTP requests (default {DEFAULT_MAX_WORKERS}).",
+    )
+    parser.add_argument(
+        "--no-http-cache",
+        action="store_true",
+        help="Ignore and don't write the .download-cache/http/ response cache.",
+    )
     return parser.parse_args()
 
 
-def resolve_stlite_version(args: argparse.Namespace) -> str:
+def resolve_stlite_version(args: argparse.Namespace, client: CachedHTTPClient) -> str:
     version = args.stlite_version_flag or args.stlite_version
     if version is None:
         current = read_current_stlite_version()
@@ -189,24 +206,33 @@ def resolve_stlite_version(args: argparse.Namespace) -> str:
         version = current
         print(f"Using current @stlite/browser version: {version}")
     if version == "latest":
-        version = fetch_latest_stlite_browser_version()
+        version = fetch_latest_stlite_browser_version(client)
         print(f"Latest @stlite/browser on npm: {version}")
     return version
 
 
 def main() -> int:
     args = parse_args()
-    stlite_version = resolve_stlite_version(args)
-
-    if args.pyodide_version:
-        pyodide_version = args.pyodide_version
-        print(f"Using Pyodide v{pyodide_version} (--pyodide-version)")
-    else:
-        print(f"Looking up stlite commit for @stlite/browser@{stlite_version}...")
-        stlite_commit = find_stlite_commit_for_browser_version(stlite_version)
-        print(f"  commit: {stlite_commit}")
-        pyodide_version = pyodide_version_from_stlite_commit(stlite_commit)
-        print(f"  Pyodide: v{pyodide_version}")
+    with CachedHTTPClient(
+        cache_dir=None if args.no_http_cache else HTTP_CACHE_DIR,
+        max_workers=args.jobs,
+    ) as client:
+        stlite_version = resolve_stlite_version(args, client)
+
+        if args.pyodide_version:
+            pyodide_version = args.pyodide_version
+            print(f"Using Pyodide v{pyodide_version} (--pyodide-version)")
+        else:
+            print(f"Looking up stlite commit for @stlite/browser@{stlite_version}...")
+            stlite_commit = find_stlite_commit_for_browser_version(client, stlite_version)
+            print(f"  commit: {stlite_commit}")
+            pyodide_version = pyodide_version_from_stlite_commit(client, stlite_commit)
+            print(f"  Pyodide: v{pyodide_version}")
+        stats = client.stats
+        print(
+            f"  HTTP: {stats['requests']} requests ({stats['not_modified']} not modified), "
+            f"{stats['cache_hits']} served from cache"
+        )
 
     lock_url = pyodide_lock_url(pyodide_version)
     print(f"Fetching {lock_url}")
@@ -214,8 +240,10 @@ def main() -> int:
         pyodide_version, use_cache=True, write_cache=not args.dry_run
     )
 
+    # Outside dry runs the lockfile is now cached; index it for the next build.
     requirements, warnings = resolve_stlite_requirements(
-        pyodide_version, lock=pyodide_lock
+        pyodide_version,
+        lock=pyodide_lock if args.dry_run else pyodide_lock_index(pyodide_version),
     )
 
     print("\nResolved requirements (pmotools-app/pyproject.toml):")
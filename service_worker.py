@@ -0,0 +1,217 @@
+"""
+Offline-first service worker for the built site.
+
+``build_site.py --service-worker`` writes ``docs/sw.js``, which precaches every file
+the build wrote under docs/ (index.html, URL-mounted images and example_data, and
+with ``--offline`` the vendored stlite bundle, Pyodide runtime and wheels) plus, for
+CDN builds, stlite.js/stlite.css, the Pyodide core files and the lockfile packages the requirements pull in.
+Requests are answered cache-first, so warm starts do not touch the network.
+
+The cache is named after the stlite/Pyodide pins, the pmotools-app commit and a hash
+of the precached outputs; ``sw.js`` changes whenever any of them does, so the browser
+installs the new worker and the old cache is deleted on activation.
+
+Dropping ``--service-worker`` later replaces ``sw.js`` with a worker that deletes its
+caches and unregisters itself, so browsers that installed the old one recover.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+import jinja2
+
+from build_manifest import sha256_bytes, sha256_json, write_if_changed
+from offline_assets import PYODIDE_BOOT_PACKAGES, PYODIDE_CORE_FILES, PYODIDE_LOCK_FILE
+from stlite_requirements import (
+    lock_closure,
+    normalize_name,
+    package_name,
+    pyodide_cdn_base_url,
+)
+
+SERVICE_WORKER_NAME = "sw.js"
+CACHE_PREFIX = "pmo-"
+
+# Never precached: build bookkeeping, the worker itself and encoded siblings (the
+# browser decodes Content-Encoding before the response reaches the cache).
+_EXCLUDED_OUTPUTS = frozenset({"build-manifest.json", "asset-manifest.json", "404.html"})
+_EXCLUDED_SUFFIXES = (".br", ".gz")
+
+_SERVICE_WORKER_JS = jinja2.Template(
+    """\
+// Generated by build_site.py --service-worker; do not edit.
+const CACHE = {{ cache_name }};
+const PRECACHE = {{ precache }};
+// Versioned or content-addressed URLs: safe to serve from cache forever.
+const IMMUTABLE_PREFIXES = {{ immutable_prefixes }};
+// micropip's PyPI metadata lookups: answer from cache, refresh in the background.
+const REVALIDATE_PREFIXES = ["https://pypi.org/pypi/"];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches
+      .open(CACHE)
+      .then((cache) => cache.addAll(PRECACHE.map((url) => new URL(url, self.registration.scope))))
+      .then(() => self.skipWaiting()),
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches
+      .keys()
+      .then((keys) =>
+        Promise.all(
+          keys
+            .filter((key) => key.startsWith("{{ prefix }}") && key !== CACHE)
+            .map((key) => caches.delete(key)),
+        ),
+      )
+      .then(() => self.clients.claim()),
+  );
+});
+
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) {
+    return cached;
+  }
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(CACHE);
+    await cache.put(request, response.clone());
+  }
+  return response;
+}
+
+async function staleWhileRevalidate(event) {
+  const cached = await caches.match(event.request);
+  const refresh = fetch(event.request).then(async (response) => {
+    if (response.ok) {
+      const cache = await caches.open(CACHE);
+      await cache.put(event.request, response.clone());
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(refresh.catch(() => undefined));
+    return cached;
+  }
+  return refresh;
+}
+
+self.addEventListener("fetch", (event) => {
+  const { request } = event;
+  if (request.method !== "GET") {
+    return;
+  }
+  const url = new URL(request.url);
+  if (request.mode === "navigate" && url.origin === location.origin) {
+    // Streamlit page URLs all boot the same app.
+    event.respondWith(
+      caches.match(new URL("index.html", self.registration.scope)).then(
+        (cached) => cached || fetch(request),
+      ),
+    );
+  } else if (url.origin === location.origin) {
+    if (!url.pathname.includes("/__livereload")) {
+      event.respondWith(cacheFirst(request));
+    }
+  } else if (IMMUTABLE_PREFIXES.some((prefix) => request.url.startsWith(prefix))) {
+    event.respondWith(cacheFirst(request));
+  } else if (REVALIDATE_PREFIXES.some((prefix) => request.url.startsWith(prefix))) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});
+"""
+)
+
+_RETIRED_SERVICE_WORKER_JS = """\
+// Generated by build_site.py without --service-worker: remove the previous worker
+// and its "pmo-" caches (service_worker.CACHE_PREFIX).
+self.addEventListener("install", () => self.skipWaiting());
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches
+      .keys()
+      .then((keys) =>
+        Promise.all(keys.filter((key) => key.startsWith("pmo-")).map((key) => caches.delete(key))),
+      )
+      .then(() => self.registration.unregister())
+      .then(() => self.clients.matchAll({ type: "window" }))
+      .then((clients) => clients.forEach((client) => client.navigate(client.url))),
+  );
+});
+"""
+
+
+def _cdn_precache(
+    stlite_version: str, pyodide_version: str, requirements: list[str], lock: dict
+) -> list[str]:
+    """stlite entry files, Pyodide core files and the lockfile packages the requirements
+    need, as CDN URLs."""
+    packages = lock.get("packages", {})
+    names = list(PYODIDE_BOOT_PACKAGES) + [
+        normalize_name(package_name(requirement)) for requirement in requirements
+    ]
+    stlite_base = f"https://cdn.jsdelivr.net/npm/@stlite/browser@{stlite_version}/build/"
+    base = pyodide_cdn_base_url(pyodide_version)
+    return [stlite_base + "stlite.js", stlite_base + "stlite.css"] + [
+        base + name for name in PYODIDE_CORE_FILES + (PYODIDE_LOCK_FILE,)
+    ] + [
+        base + packages[name]["file_name"] for name in lock_closure(lock, names)
+    ]
+
+
+def write_service_worker(
+    build_dir: str,
+    manifest: dict,
+    *,
+    stlite_version: str,
+    pyodide_version: str,
+    pmotools_app_commit: str,
+    requirements: list[str],
+    lock: dict,
+    offline: bool,
+) -> None:
+    """Write docs/sw.js for the outputs recorded in ``manifest`` so far."""
+    precache = {
+        rel_path: digest
+        for rel_path, digest in sorted(manifest["outputs"].items())
+        if rel_path not in _EXCLUDED_OUTPUTS and not rel_path.endswith(_EXCLUDED_SUFFIXES)
+    }
+    urls = list(precache)
+    immutable_prefixes = [
+        f"https://cdn.jsdelivr.net/npm/@stlite/browser@{stlite_version}/",
+        pyodide_cdn_base_url(pyodide_version),
+        "https://files.pythonhosted.org/packages/",
+    ]
+    if not offline:
+        urls.extend(_cdn_precache(stlite_version, pyodide_version, requirements, lock))
+
+    revision = sha256_json(
+        {"outputs": precache, "requirements": requirements, "urls": urls}
+    )
+    cache_name = (
+        f"{CACHE_PREFIX}stlite-{stlite_version}-pyodide-{pyodide_version}"
+        f"-app-{pmotools_app_commit[:12]}-{revision[:12]}"
+    )
+    text = _SERVICE_WORKER_JS.render(
+        cache_name=json.dumps(cache_name),
+        precache=json.dumps(urls, indent=2),
+        immutable_prefixes=json.dumps(immutable_prefixes, indent=2),
+        prefix=CACHE_PREFIX,
+    )
+    write_if_changed(os.path.join(build_dir, SERVICE_WORKER_NAME), text)
+    manifest["outputs"][SERVICE_WORKER_NAME] = sha256_bytes(text.encode())
+    manifest["service_worker"] = {"cache": cache_name, "precache": len(urls)}
+
+
+def retire_service_worker(build_dir: str, manifest: dict, previous: dict) -> None:
+    """Keep serving an unregistering sw.js once a build has shipped a service worker."""
+    if SERVICE_WORKER_NAME not in previous.get("outputs", {}):
+        return
+    write_if_changed(os.path.join(build_dir, SERVICE_WORKER_NAME), _RETIRED_SERVICE_WORKER_JS)
+    manifest["outputs"][SERVICE_WORKER_NAME] = sha256_bytes(_RETIRED_SERVICE_WORKER_JS.encode())
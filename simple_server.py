@@ -1,34 +1,385 @@
+import argparse
+import collections
+import concurrent.futures
+import datetime
+import email.utils
+import functools
+import glob
 import http.server
+import importlib
+import io
+import json
+import queue
+import re
 import socketserver
+import stat
+import threading
+import time
 from http import HTTPStatus
 import os
 import sys
 import mimetypes
 import socket
+import urllib.parse
 
-# Check if a port is specified as a command-line argument
-if len(sys.argv) > 2:
-    PORT = int(sys.argv[2])
-else:
-    PORT = 8000
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
 
-# Set the PORT environment variable for VSCode tunneling
-os.environ['PORT'] = str(PORT)
+# Inputs that trigger a rebuild in --watch mode (relative to REPO_ROOT, glob patterns).
+# "*.py" covers build_site.py and every build module it imports.
+WATCH_PATHS = (
+    "pmotools-app",
+    "template.jinja",
+    "pyproject.toml",
+    "*.py",
+)
+# Changes to these (and to the top-level build modules) re-import build_site, which
+# re-runs requirement resolution (module-level in build_site.py).
+_RELOAD_MODULES_ON = (
+    os.path.join("pmotools-app", "pyproject.toml"),
+    os.path.join("pmotools-app", "uv.lock"),
+)
+_WATCH_SKIP_DIRS = frozenset({".git", ".venv", "__pycache__", ".pytest_cache", ".ruff_cache"})
+_WATCH_INTERVAL = 0.5
+_LIVERELOAD_PATH = "/__livereload"
+_LIVERELOAD_FILES_PATH = "/__livereload/files/"
+_SSE_KEEPALIVE_SECONDS = 15
+# Idle keep-alive connections are closed after this long so they release their worker.
+_KEEPALIVE_TIMEOUT = 5
+_COPY_CHUNK_SIZE = 64 * 1024
+# Precompressed siblings written by build_site.py --precompress, in preference order.
+_PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+# build_site.py --fingerprint names (PMO_logo.<16 hex>.png, plus .br/.gz siblings) and
+# the version-addressed vendored files under assets/ never change content.
+_FINGERPRINTED_RE = re.compile(r"\.[0-9a-f]{16}(\.[^./]+)*$")
+_IMMUTABLE_PREFIXES = ("assets/",)
+_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else (index.html above all) must be revalidated so rebuilds show up.
+_REVALIDATE_CACHE_CONTROL = "no-cache"
+_METRICS_PATH = "/__metrics"
+# Request duration histogram buckets, in seconds.
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Distinct path labels kept before new paths are counted as "(other)" (scanners, typos).
+_MAX_METRIC_PATHS = 500
+# --file-cache: files up to this size are kept in memory, larger ones go out with
+# sendfile. Metadata is kept for at most this many files.
+_HOT_FILE_MAX_BYTES = 256 * 1024
+_FILE_CACHE_MAX_ENTRIES = 4096
 
-# Check if a directory is specified as a command-line argument
-if len(sys.argv) > 1:
-    os.chdir(sys.argv[1])
+class RequestMetrics:
+    """Per-path request counters and latency histograms, rendered for Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._in_flight = 0
+        self._in_flight_max = 0
+        self._requests: dict[tuple[str, str, str], int] = {}
+        self._bytes: dict[str, int] = {}
+        self._latency: dict[str, list] = {}
+
+    def start(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self._in_flight_max = max(self._in_flight_max, self._in_flight)
+
+    def finish(self, path: str, method: str, status: str, sent: int, seconds: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if path not in self._latency and len(self._latency) >= _MAX_METRIC_PATHS:
+                path = "(other)"
+            key = (path, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._bytes[path] = self._bytes.get(path, 0) + sent
+            histogram = self._latency.setdefault(path, [0] * len(_LATENCY_BUCKETS) + [0, 0.0])
+            for index, bound in enumerate(_LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        def label(value):
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        with self._lock:
+            lines = [
+                "# HELP pmo_http_requests_total Requests by path, method and status code.",
+                "# TYPE pmo_http_requests_total counter",
+            ]
+            for (path, method, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'pmo_http_requests_total{{path="{label(path)}",method="{method}",'
+                    f'status="{status}"}} {count}'
+                )
+            lines += [
+                "# HELP pmo_http_response_bytes_total Bytes sent (headers and body) by path.",
+                "# TYPE pmo_http_response_bytes_total counter",
+            ]
+            for path, sent in sorted(self._bytes.items()):
+                lines.append(f'pmo_http_response_bytes_total{{path="{label(path)}"}} {sent}')
+            lines += [
+                "# HELP pmo_http_request_duration_seconds Time from request line to last byte.",
+                "# TYPE pmo_http_request_duration_seconds histogram",
+            ]
+            for path, histogram in sorted(self._latency.items()):
+                name = "pmo_http_request_duration_seconds"
+                path_label = f'path="{label(path)}"'
+                for bound, count in zip(_LATENCY_BUCKETS, histogram):
+                    lines.append(f'{name}_bucket{{{path_label},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{path_label},le="+Inf"}} {histogram[-2]}')
+                lines.append(f"{name}_sum{{{path_label}}} {histogram[-1]:.6f}")
+                lines.append(f"{name}_count{{{path_label}}} {histogram[-2]}")
+            lines += [
+                "# HELP pmo_http_requests_in_flight Requests being handled now.",
+                "# TYPE pmo_http_requests_in_flight gauge",
+                f"pmo_http_requests_in_flight {self._in_flight}",
+                "# HELP pmo_http_requests_in_flight_max Most requests handled at once since start.",
+                "# TYPE pmo_http_requests_in_flight_max gauge",
+                f"pmo_http_requests_in_flight_max {self._in_flight_max}",
+                "# HELP pmo_http_start_time_seconds Server start time (Unix epoch).",
+                "# TYPE pmo_http_start_time_seconds gauge",
+                f"pmo_http_start_time_seconds {self._started:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+class JSONAccessLog:
+    """One JSON object per request, appended to a file or stdout."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._file = sys.stdout if path == "-" else open(path, "a", buffering=1)  # noqa: SIM115
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+class _CachedFile:
+    """Response metadata for one file revision, and its body if it is small."""
+
+    __slots__ = ("body", "encoding", "entity", "etag", "key", "mtime", "size", "validators")
+
+    def __init__(self, key, size, mtime, etag, encoding, validators, entity, body):
+        self.key = key
+        self.size = size
+        self.mtime = mtime
+        self.etag = etag
+        self.encoding = encoding
+        self.validators = validators
+        self.entity = entity
+        self.body = body
+
+# send_head falls back to the uncached path when _send_head_cached returns this.
+_UNCACHED = object()
+
+def _stat_key(st):
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _header_block(fields: dict) -> bytes:
+    return "".join(f"{keyword}: {value}\r\n" for keyword, value in fields.items()).encode(
+        "latin-1", "strict"
+    )
+
+class FileCache:
+    """Precomputed headers per file and the bodies of small hot files (--file-cache).
+
+    An entry is reused while the file's mtime, size and inode match os.stat, so each
+    request costs one stat instead of stat/open/fstat/read/close. The list of .br/.gz
+    siblings is kept per file and reread when its directory's mtime changes.
+    Bodies are copied into memory rather than mmapped: build_site.py rewrites files
+    in place, and a truncated mapping would crash the server.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[str, _CachedFile] = collections.OrderedDict()
+        self._variants: dict[str, tuple[int, frozenset]] = {}
+        self._body_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def variants(self, path: str) -> frozenset:
+        """Precompressed suffixes that exist next to path."""
+        directory_mtime = os.stat(os.path.dirname(path)).st_mtime_ns
+        cached = self._variants.get(path)
+        if cached is not None and cached[0] == directory_mtime:
+            return cached[1]
+        available = frozenset(
+            suffix for _, suffix in _PRECOMPRESSED_SUFFIXES if os.path.isfile(path + suffix)
+        )
+        with self._lock:
+            if len(self._variants) >= _FILE_CACHE_MAX_ENTRIES:
+                self._variants.clear()
+            self._variants[path] = (directory_mtime, available)
+        return available
+
+    def get(self, path: str, key) -> _CachedFile | None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.key != key:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry
+
+    def put(self, path: str, entry: _CachedFile) -> None:
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None and old.body is not None:
+                self._body_bytes -= len(old.body)
+            if entry.body is not None and len(entry.body) > self.max_bytes:
+                entry.body = None
+            self._entries[path] = entry
+            if entry.body is not None:
+                self._body_bytes += len(entry.body)
+            while self._entries and (
+                self._body_bytes > self.max_bytes or len(self._entries) > _FILE_CACHE_MAX_ENTRIES
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                if evicted.body is not None:
+                    self._body_bytes -= len(evicted.body)
+
+    def render(self) -> str:
+        """Hit/miss counters and cached bytes, in the /__metrics format."""
+        with self._lock:
+            return "\n".join(
+                [
+                    "# HELP pmo_http_file_cache_hits_total Requests served from cached file metadata.",
+                    "# TYPE pmo_http_file_cache_hits_total counter",
+                    f"pmo_http_file_cache_hits_total {self.hits}",
+                    "# HELP pmo_http_file_cache_misses_total Requests that (re)read a file's metadata.",
+                    "# TYPE pmo_http_file_cache_misses_total counter",
+                    f"pmo_http_file_cache_misses_total {self.misses}",
+                    "# HELP pmo_http_file_cache_bytes Bytes of file bodies held in memory.",
+                    "# TYPE pmo_http_file_cache_bytes gauge",
+                    f"pmo_http_file_cache_bytes {self._body_bytes}",
+                ]
+            ) + "\n"
+
+class _CountingWriter:
+    """wfile wrapper that counts the bytes written to the socket."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.count = 0
+
+    def write(self, data):
+        written = self._raw.write(data)
+        self.count += len(data) if written is None else written
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
 
 class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Set by main() with --metrics / --access-log / --file-cache.
+    metrics: RequestMetrics | None = None
+    access_log: JSONAccessLog | None = None
+    file_cache: FileCache | None = None
+    _send_with_headers = None
+
+    def setup(self):
+        super().setup()
+        if self.metrics is not None or self.access_log is not None:
+            self.wfile = _CountingWriter(self.wfile)
+
+    def parse_request(self):
+        self._request_started = time.perf_counter()
+        self._status = None
+        self._content_encoding = None
+        self._send_with_headers = None
+        if self.metrics is not None:
+            self.metrics.start()
+        return super().parse_request()
+
+    def handle_one_request(self):
+        self._request_started = None
+        sent = getattr(self.wfile, "count", 0)
+        try:
+            super().handle_one_request()
+        finally:
+            if self._request_started is not None:
+                self._record_request(getattr(self.wfile, "count", 0) - sent)
+
+    def _record_request(self, sent):
+        seconds = time.perf_counter() - self._request_started
+        valid = self.command is not None
+        path = urllib.parse.urlsplit(self.path).path if valid else "(invalid)"
+        method = self.command or "-"
+        status = str(self._status) if self._status is not None else "-"
+        if self.metrics is not None:
+            self.metrics.finish(path, method, status, sent, seconds)
+        if self.access_log is not None and not self._is_tls_handshake():
+            self.access_log.write(
+                {
+                    "time": datetime.datetime.now(datetime.UTC).isoformat(
+                        timespec="milliseconds"
+                    ),
+                    "client": self.client_address[0],
+                    "method": method,
+                    "path": self.path if valid else None,
+                    "status": self._status,
+                    "bytes": sent,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "encoding": self._content_encoding,
+                    "range": self.headers.get("Range") if valid else None,
+                    "user_agent": self.headers.get("User-Agent") if valid else None,
+                    "referer": self.headers.get("Referer") if valid else None,
+                }
+            )
+
+    def _is_tls_handshake(self):
+        return self.raw_requestline.startswith(b"\x16\x03")
+
     def send_response_only(self, code, message=None):
+        self._status = int(code)
+        self._content_encoding = None
         super().send_response_only(code, message)
-        
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "content-encoding":
+            self._content_encoding = value
+        super().send_header(keyword, value)
+
+    def do_GET(self):
+        if self.metrics is not None and urllib.parse.urlsplit(self.path).path == _METRICS_PATH:
+            self.send_metrics()
+        else:
+            super().do_GET()
+
+    def send_metrics(self):
+        body = self.metrics.render()
+        if self.file_cache is not None:
+            body += self.file_cache.render()
+        body = body.encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+
     def end_headers(self):
         # Add CORS headers
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
         super().end_headers()
+
+    def flush_headers(self):
+        # A cached small body goes out in the same write as its headers.
+        body, self._send_with_headers = self._send_with_headers, None
+        if body is not None and hasattr(self, "_headers_buffer"):
+            self._headers_buffer.append(body)
+            body = None
+        super().flush_headers()
+        if body is not None:
+            self.wfile.write(body)
         
     def do_OPTIONS(self):
         self.send_response(HTTPStatus.NO_CONTENT)
@@ -37,11 +388,290 @@ class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
     def guess_type(self, path):
         # Override to set correct MIME type for .whl files
         if path.endswith('.whl'):
-            return 'application/zip', None
+            return 'application/zip'
         # Use mimetypes directly for other files
-        mimetype, encoding = mimetypes.guess_type(path)
-        return mimetype, encoding
+        mimetype, _ = mimetypes.guess_type(path)
+        return mimetype or 'application/octet-stream'
+
+    def send_head(self):
+        """Serve files with ETag/Last-Modified revalidation and single byte ranges."""
+        self._range_length = None
+        if self.file_cache is not None:
+            f = self._send_head_cached()
+            if f is not _UNCACHED:
+                return f
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                # Redirects and directory listings
+                return super().send_head()
+            path = index
+        if path.endswith("/"):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        ctype = self.guess_type(path)
+        path, content_encoding, varies = self._precompressed_variant(path)
+        try:
+            f = open(path, 'rb')  # noqa: SIM115 (closed by the caller, as in http.server)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            fs = os.fstat(f.fileno())
+            etag = f'"{fs.st_mtime_ns:x}-{fs.st_size:x}"'
+            validators = {
+                "ETag": etag,
+                "Last-Modified": self.date_time_string(fs.st_mtime),
+                "Cache-Control": self._cache_control(path),
+            }
+            if varies:
+                validators["Vary"] = "Accept-Encoding"
+            entity = {"Content-type": ctype}
+            if content_encoding:
+                entity["Content-Encoding"] = content_encoding
+            entity["Accept-Ranges"] = "bytes"
+            start = self._send_file_headers(fs.st_size, fs.st_mtime, etag, validators, entity)
+            if start is None:
+                f.close()
+                return None
+            f.seek(start)
+            return f
+        except:
+            f.close()
+            raise
+
+    def _send_file_headers(self, size, mtime, etag, validators, entity, body=None):
+        """Answer 304/416 (returns None), or send 200/206 headers and return the offset.
+
+        validators and entity are dicts of headers, or header blocks from FileCache.
+        A GET for an in-memory ``body`` is answered in full, in one write.
+        """
+        if self._not_modified(etag, mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_fields(validators)
+            self.end_headers()
+            return None
+
+        byte_range = self._requested_range(size, etag, mtime)
+        if byte_range == ():
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if byte_range:
+            start, end = byte_range
+            self._range_length = end - start + 1
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(self._range_length))
+        else:
+            start = 0
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Length", str(size))
+        self._send_fields(entity)
+        self._send_fields(validators)
+        if body is not None and self.command == "GET":
+            length = size if self._range_length is None else self._range_length
+            self._send_with_headers = memoryview(body)[start:start + length]
+        self.end_headers()
+        return start
+
+    def _send_fields(self, fields):
+        if isinstance(fields, dict):
+            for keyword, value in fields.items():
+                self.send_header(keyword, value)
+        elif self.request_version != "HTTP/0.9":
+            self._headers_buffer.append(fields)
+
+    def _send_head_cached(self):
+        """send_head for --file-cache; returns _UNCACHED for what it doesn't handle
+        (directories without index.html, redirects, missing files)."""
+        path = self.translate_path(self.path)
+        try:
+            st = os.stat(path)
+            if stat.S_ISDIR(st.st_mode):
+                if not self.path.split("?", 1)[0].endswith("/"):
+                    return _UNCACHED
+                path = os.path.join(path, "index.html")
+                st = os.stat(path)
+            if not stat.S_ISREG(st.st_mode) or path.endswith("/"):
+                return _UNCACHED
+            original = path
+            available = self.file_cache.variants(path)
+            path, content_encoding, varies = self._precompressed_variant(
+                path, exists=lambda variant: variant[len(original):] in available
+            )
+            if content_encoding:
+                st = os.stat(path)
+        except OSError:
+            return _UNCACHED
+
+        entry = self.file_cache.get(path, _stat_key(st))
+        f = None
+        if entry is None or entry.body is None:
+            try:
+                f = open(path, "rb")  # noqa: SIM115 (returned to send_head's caller)
+            except OSError:
+                return _UNCACHED
+        try:
+            if f is not None:
+                fs = os.fstat(f.fileno())
+                if entry is None or entry.key != _stat_key(fs):
+                    body = f.read() if fs.st_size <= _HOT_FILE_MAX_BYTES else None
+                    entry = self._cache_entry(original, path, fs, content_encoding, varies, body)
+                    if body is not None:
+                        f.close()
+                        f = None
+            self._content_encoding = entry.encoding
+            start = self._send_file_headers(
+                entry.size,
+                entry.mtime,
+                entry.etag,
+                entry.validators,
+                entry.entity,
+                body=entry.body if f is None else None,
+            )
+            if start is None or f is None:
+                if f is not None:
+                    f.close()
+                return None
+            f.seek(start)
+            return f
+        except:
+            if f is not None:
+                f.close()
+            raise
+
+    def _cache_entry(self, original, path, fs, content_encoding, varies, body):
+        etag = f'"{fs.st_mtime_ns:x}-{fs.st_size:x}"'
+        validators = {
+            "ETag": etag,
+            "Last-Modified": self.date_time_string(fs.st_mtime),
+            "Cache-Control": self._cache_control(path),
+        }
+        if varies:
+            validators["Vary"] = "Accept-Encoding"
+        entity = {"Content-type": self.guess_type(original)}
+        if content_encoding:
+            entity["Content-Encoding"] = content_encoding
+        entity["Accept-Ranges"] = "bytes"
+        entry = _CachedFile(
+            _stat_key(fs),
+            fs.st_size,
+            fs.st_mtime,
+            etag,
+            content_encoding,
+            _header_block(validators),
+            _header_block(entity),
+            body,
+        )
+        self.file_cache.put(path, entry)
+        return entry
+
+    def _cache_control(self, path):
+        rel_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        if _FINGERPRINTED_RE.search(os.path.basename(rel_path)) or rel_path.startswith(
+            _IMMUTABLE_PREFIXES
+        ):
+            return _IMMUTABLE_CACHE_CONTROL
+        return _REVALIDATE_CACHE_CONTROL
+
+    def _precompressed_variant(self, path, exists=os.path.isfile):
+        """Return (path to send, Content-Encoding or None, whether variants exist)."""
+        accepted = {}
+        for item in self.headers.get("Accept-Encoding", "").split(","):
+            coding, _, params = item.partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[coding.strip().lower()] = quality
+        varies = False
+        for encoding, suffix in _PRECOMPRESSED_SUFFIXES:
+            if not exists(path + suffix):
+                continue
+            varies = True
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return path + suffix, encoding, True
+        return path, None, varies
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # Weak comparison (RFC 9110 13.1.2)
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, IndexError, OverflowError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.UTC)
+            return int(mtime) <= since.timestamp()
+        return False
+
+    def _requested_range(self, size, etag, mtime):
+        """Return (start, end) for a satisfiable single range, () if unsatisfiable, else None.
+
+        Multi-range, malformed and invalid (``bytes=5-2``) headers fall back to the full
+        file, as RFC 9110 requires for invalid range-specs.
+        """
+        header = self.headers.get("Range")
+        if not header or not header.startswith("bytes=") or "," in header:
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range != etag and if_range != self.date_time_string(mtime):
+            return None
+        first, sep, last = header[len("bytes="):].strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and start > end:
+                    # Not a valid range-spec (bytes=5-2): ignored, like a malformed header.
+                    return None
+            elif last:
+                start, end = max(size - int(last), 0), size - 1
+            else:
+                return None
+        except ValueError:
+            return None
+        if start >= size or start > end:
+            return ()
+        return start, min(end, size - 1)
+
+    def copyfile(self, source, outputfile):
+        if self.file_cache is not None and isinstance(source, io.BufferedReader):
+            # sendfile(2): the kernel copies the file to the socket.
+            sent = self.connection.sendfile(source, source.tell(), self._range_length)
+            if isinstance(self.wfile, _CountingWriter):
+                self.wfile.count += sent
+            return
+        if self._range_length is None:
+            return super().copyfile(source, outputfile)
+        remaining = self._range_length
+        while remaining > 0:
+            chunk = source.read(min(remaining, _COPY_CHUNK_SIZE))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
     
+    def log_request(self, code='-', size='-'):
+        # The JSON access log replaces the text access lines; errors are still logged.
+        if self.access_log is None:
+            super().log_request(code, size)
+
     def log_message(self, format, *args):
         # Suppress TLS/SSL handshake errors (they're just noise)
         if len(args) > 1 and 'Bad request' in str(args[1]):
@@ -55,6 +685,91 @@ class CORSRequestHandler(http.server.SimpleHTTPRequestHandler):
         # Log legitimate HTTP requests
         super().log_message(format, *args)
 
+class ProductionRequestHandler(CORSRequestHandler):
+    """HTTP/1.1 keep-alive; idle connections time out so they free their worker."""
+    protocol_version = "HTTP/1.1"
+    timeout = _KEEPALIVE_TIMEOUT
+    # Headers and body go out as separate writes; don't let Nagle delay the body.
+    disable_nagle_algorithm = True
+
+class LiveReloadHub:
+    """Fan-out of live-reload events to every connected browser tab."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: set[queue.Queue] = set()
+
+    def subscribe(self) -> queue.Queue:
+        client = queue.Queue()
+        with self._lock:
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client: queue.Queue) -> None:
+        with self._lock:
+            self._clients.discard(client)
+
+    def publish(self, event: str, data: dict) -> None:
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.put((event, data))
+
+class LiveReloadRequestHandler(CORSRequestHandler):
+    """Adds the SSE endpoint and raw source files for the --watch client in index.html."""
+
+    hub: LiveReloadHub
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path == _LIVERELOAD_PATH:
+            self.stream_events()
+        elif path.startswith(_LIVERELOAD_FILES_PATH):
+            self.send_app_source(urllib.parse.unquote(path[len(_LIVERELOAD_FILES_PATH):]))
+        else:
+            super().do_GET()
+
+    def stream_events(self):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        client = self.hub.subscribe()
+        try:
+            while True:
+                try:
+                    event, data = client.get(timeout=_SSE_KEEPALIVE_SECONDS)
+                    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                except queue.Empty:
+                    message = ": keepalive\n\n"
+                self.wfile.write(message.encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.hub.unsubscribe(client)
+            self.close_connection = True
+
+    def send_app_source(self, name):
+        # Same text build_site.py inlines into mount() for this file.
+        app_dir = os.path.realpath(os.path.join(REPO_ROOT, "pmotools-app"))
+        path = os.path.realpath(os.path.join(app_dir, name))
+        if not path.startswith(app_dir + os.sep) or not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        with open(path, "r") as f:
+            content = f.read()
+        build_site = sys.modules["build_site"]
+        if name == build_site.entrypoint:
+            content = build_site._COMMIT_LOG_SNIPPET + content
+        body = content.encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
 class ReusableTCPServer(socketserver.TCPServer):
     """TCPServer that allows immediate port reuse."""
     allow_reuse_address = True
@@ -64,13 +779,245 @@ class ReusableTCPServer(socketserver.TCPServer):
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         super().server_bind()
 
-if __name__ == '__main__':
-    handler = CORSRequestHandler
-    with ReusableTCPServer(("", PORT), handler) as httpd:
-        print(f"Serving directory {os.getcwd()} at port {PORT}")
+class PooledTCPServer(ReusableTCPServer):
+    """Serve connections on a fixed-size worker pool (production mode)."""
+    request_queue_size = 128
+
+    def __init__(self, server_address, RequestHandlerClass, workers=16):
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="http-worker"
+        )
+        super().__init__(server_address, RequestHandlerClass)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # noqa: BLE001 (as in socketserver's process_request_thread)
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class ReusableThreadingTCPServer(socketserver.ThreadingMixIn, ReusableTCPServer):
+    """Threaded variant so long-lived SSE connections don't block file requests."""
+    daemon_threads = True
+
+def _watch_snapshot() -> dict[str, tuple[int, int]]:
+    """Return {path: (mtime_ns, size)} for every watched file."""
+    snapshot = {}
+    for watch_path in (path for pattern in WATCH_PATHS for path in sorted(glob.glob(pattern))):
+        if os.path.isfile(watch_path):
+            stat = os.stat(watch_path)
+            snapshot[watch_path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for root, dirs, files in os.walk(watch_path):
+            dirs[:] = [d for d in dirs if d not in _WATCH_SKIP_DIRS]
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+def _livereload_event(before: dict, after: dict) -> tuple[str, dict] | None:
+    """Decide between hot-swapping changed app files and a full page reload."""
+    if after["outputs"].get("index.html") == before["outputs"].get("index.html"):
+        changed_assets = [
+            path for path, digest in after["outputs"].items()
+            if before["outputs"].get(path) != digest
+        ]
+        if not changed_assets:
+            return None
+    for key in ("pins", "requirements"):
+        if before.get(key) != after.get(key):
+            return "reload", {}
+    before_inputs, after_inputs = before["inputs"], after["inputs"]
+    if before_inputs.keys() != after_inputs.keys():
+        return "reload", {}
+
+    files = []
+    for key, digest in sorted(after_inputs.items()):
+        if before_inputs[key] == digest:
+            continue
+        if not key.startswith("pmotools-app/"):
+            return "reload", {}
+        name = key[len("pmotools-app/"):]
+        if name in after["outputs"]:
+            files.append({"name": name, "url": name, "binary": True})
+        else:
+            url = _LIVERELOAD_FILES_PATH.lstrip("/") + urllib.parse.quote(name)
+            files.append({"name": name, "url": url, "binary": False})
+    if not files:
+        return "reload", {}
+    return "update", {"files": files}
+
+def _repo_modules() -> list[str]:
+    """Names of the imported modules that are top-level files of this repo."""
+    return [
+        name
+        for name, module in sys.modules.items()
+        if name != "__main__"
+        and getattr(module, "__file__", None)
+        and os.path.dirname(os.path.abspath(module.__file__)) == REPO_ROOT
+    ]
+
+def _rebuild(changed: set[str], hub: LiveReloadHub) -> None:
+    if any(
+        path in _RELOAD_MODULES_ON or (path.endswith(".py") and not os.path.dirname(path))
+        for path in changed
+    ):
+        # Drop every build module so build_site's imports pick up the edited ones.
+        for name in _repo_modules():
+            del sys.modules[name]
+    build_site = importlib.import_module("build_site")
+    import build_manifest
+
+    started = time.perf_counter()
+    before = build_manifest.load_manifest(build_site.build_dir)
+    build_site.build_site(incremental=True, livereload=True)
+    after = build_manifest.load_manifest(build_site.build_dir)
+    print(f"Rebuilt {build_site.build_dir}/ in {time.perf_counter() - started:.2f}s")
+
+    event = _livereload_event(before, after)
+    if event is not None:
+        hub.publish(*event)
+
+def watch_and_rebuild(hub: LiveReloadHub, stop: threading.Event) -> None:
+    """Poll WATCH_PATHS and rebuild once a burst of edits has settled."""
+    snapshot = _watch_snapshot()
+    while not stop.wait(_WATCH_INTERVAL):
+        current = _watch_snapshot()
+        if current == snapshot:
+            continue
+        # Let editors finish writing (save-all, formatters) before rebuilding.
+        while not stop.wait(_WATCH_INTERVAL):
+            settled = _watch_snapshot()
+            if settled == current:
+                break
+            current = settled
+        changed = {
+            path for path in current.keys() | snapshot.keys()
+            if current.get(path) != snapshot.get(path)
+        }
+        snapshot = current
+        print(f"Changed: {', '.join(sorted(changed))}")
+        try:
+            _rebuild(changed, hub)
+        except Exception as e:  # noqa: BLE001 (keep serving; the next save retries)
+            print(f"Rebuild failed: {e!r}", file=sys.stderr)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the built site (docs/) locally.")
+    parser.add_argument("directory", nargs="?", default=".", help="Directory to serve.")
+    parser.add_argument("port", nargs="?", type=int, default=8000, help="Port (default 8000).")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Rebuild docs/ when pmotools-app/, template.jinja or stlite_requirements.py "
+            "change and push updates to open tabs."
+        ),
+    )
+    mode.add_argument(
+        "--production",
+        action="store_true",
+        help="Serve with HTTP/1.1 keep-alive on a pool of --workers threads.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=16,
+        help="Worker threads in --production mode (default 16).",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help=(
+            f"Serve per-path request counts, latency histograms, bytes sent, status codes "
+            f"and in-flight requests at {_METRICS_PATH} (Prometheus text format)."
+        ),
+    )
+    parser.add_argument(
+        "--access-log",
+        metavar="PATH",
+        help="Write one JSON line per request to PATH ('-' for stdout) instead of text lines.",
+    )
+    parser.add_argument(
+        "--file-cache",
+        action="store_true",
+        help=(
+            f"Keep headers for every file and files up to {_HOT_FILE_MAX_BYTES // 1024} KiB in "
+            "memory (revalidated by mtime); send larger files with sendfile."
+        ),
+    )
+    parser.add_argument(
+        "--file-cache-mb",
+        type=int,
+        default=64,
+        help="Memory for --file-cache file bodies, in MiB (default 64).",
+    )
+    return parser.parse_args()
+
+def main() -> None:
+    args = parse_args()
+    PORT = args.port
+    directory = os.path.abspath(args.directory)
+
+    # Set the PORT environment variable for VSCode tunneling
+    os.environ['PORT'] = str(PORT)
+
+    if args.metrics:
+        CORSRequestHandler.metrics = RequestMetrics()
+        print(f"Metrics at http://localhost:{PORT}{_METRICS_PATH}")
+    if args.access_log:
+        CORSRequestHandler.access_log = JSONAccessLog(args.access_log)
+    if args.file_cache:
+        CORSRequestHandler.file_cache = FileCache(args.file_cache_mb * 1024 * 1024)
+
+    if args.production:
+        handler = functools.partial(ProductionRequestHandler, directory=directory)
+        server_class = functools.partial(PooledTCPServer, workers=args.workers)
+        print(f"Production mode: HTTP/1.1 keep-alive, {args.workers} workers")
+    elif not args.watch:
+        handler = functools.partial(CORSRequestHandler, directory=directory)
+        server_class = ReusableTCPServer
+    else:
+        # build_site.py works relative to the repo root.
+        os.chdir(REPO_ROOT)
+        sys.path.insert(0, REPO_ROOT)
+        import build_site
+
+        hub = LiveReloadHub()
+        LiveReloadRequestHandler.hub = hub
+        handler = functools.partial(LiveReloadRequestHandler, directory=directory)
+        server_class = ReusableThreadingTCPServer
+
+        build_site.build_site(incremental=True, livereload=True)
+        stop = threading.Event()
+        watcher = threading.Thread(target=watch_and_rebuild, args=(hub, stop), daemon=True)
+        watcher.start()
+        print(f"Watching {', '.join(WATCH_PATHS)} for changes")
+
+    with server_class(("", PORT), handler) as httpd:
+        print(f"Serving directory {directory} at port {PORT}")
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\nServer stopped.")
             httpd.server_close()
+            if args.watch:
+                stop.set()
+                # Don't leave the live-reload client in docs/index.html.
+                importlib.import_module("build_site").build_site(incremental=True)
 
+if __name__ == '__main__':
+    main()
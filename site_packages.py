@@ -0,0 +1,197 @@
+"""
+Prebuilt site-packages snapshot for ``build_site.py --site-packages``.
+
+Requirements that are not in the Pyodide lockfile (pmotools, fuzzywuzzy, openpyxl,
+...) are installed by micropip at every cold start: it queries PyPI's JSON API for
+each one and its dependencies, then downloads and installs the wheels one at a time.
+With ``--site-packages`` the build does that resolution instead, the same way
+``--offline`` does (PyPI pure-Python wheels at the pmotools-app/uv.lock versions,
+sha256-verified and cached under ``.download-cache/``), and unpacks the wheels into
+one deterministic ``site-packages.zip``. ``mount()`` lists it under ``archives`` with
+Pyodide's site-packages directory as ``extractDir``, so stlite unpacks it before the
+app runs and micropip only installs lockfile packages (pandas, numpy and the lockfile
+dependencies of the snapshot packages), which need no PyPI lookups.
+
+Incremental builds reuse the archive without contacting PyPI while the requirements,
+uv.lock and the Pyodide lockfile's Python version are unchanged.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import zipfile
+
+from app_bundle import deterministic_zip
+from build_manifest import (
+    fingerprinted_path,
+    output_unchanged,
+    sha256_bytes,
+    sha256_json,
+    write_if_changed,
+)
+from lock_index import normalize_name, uv_lock_versions
+from offline_assets import (
+    cached_download,
+    pyodide_marker_environment,
+    pypi_wheel,
+    wheel_requires_dist,
+)
+from stlite_requirements import (
+    STLITE_EXCLUDED,
+    UV_LOCK,
+    package_name,
+    version_from_uv_lock,
+)
+
+ARCHIVE_NAME = "site-packages.zip"
+# Marks the snapshot's packages in their .dist-info, as micropip writes "micropip".
+INSTALLER = "pmo-build"
+
+
+def site_packages_dir(python_version: str) -> str:
+    """Pyodide's site-packages for a lockfile ``info.python`` such as '3.13.2'."""
+    major, minor = python_version.split(".")[:2]
+    return f"/lib/python{major}.{minor}/site-packages"
+
+
+def _wheel_files(wheel: bytes) -> dict[str, bytes]:
+    """Installed layout of a pure-Python wheel: {site-packages relative path: bytes}."""
+    files = {}
+    with zipfile.ZipFile(io.BytesIO(wheel)) as zf:
+        for name in zf.namelist():
+            if name.endswith("/"):
+                continue
+            target = name
+            top, _, rest = name.partition("/")
+            if top.endswith(".data"):
+                # <dist>.data/purelib/... installs at the root; scripts/headers/data
+                # have no place in the browser.
+                scheme, _, target = rest.partition("/")
+                if scheme not in ("purelib", "platlib"):
+                    continue
+            elif top.endswith(".dist-info") and rest == "WHEEL":
+                files[f"{top}/INSTALLER"] = (INSTALLER + "\n").encode()
+            files[target] = zf.read(name)
+    return files
+
+
+def _resolve(
+    requirements: list[str], lock: dict, environment: dict[str, str]
+) -> tuple[list[dict], list[str], list[str], list[str]]:
+    """Resolve the non-lockfile requirements to PyPI wheels.
+
+    Dependencies whose markers don't hold in the Pyodide marker environment are
+    skipped. Returns (wheels, lockfile names they depend on, names left to micropip,
+    warnings).
+    """
+    packages = lock.get("packages", {})
+    pending = []
+    for requirement in requirements:
+        name = normalize_name(package_name(requirement))
+        if name not in packages:
+            version = requirement.split("==", 1)[1] if "==" in requirement else None
+            pending.append((name, version, True))
+
+    wheels: dict[str, dict] = {}
+    lock_names: list[str] = []
+    unresolved: list[str] = []
+    warnings: list[str] = []
+    while pending:
+        name, version, direct = pending.pop(0)
+        if name in wheels or name in STLITE_EXCLUDED:
+            continue
+        if name in packages:
+            lock_names.append(name)
+            continue
+        version = version or version_from_uv_lock(name)
+        try:
+            if version is None:
+                raise LookupError(
+                    "not in the Pyodide lockfile or pmotools-app/uv.lock; "
+                    "micropip will fetch it from PyPI at runtime"
+                )
+            filename, url, sha256 = pypi_wheel(name, version)
+        except LookupError as e:
+            if direct:
+                raise
+            warnings.append(f"{name}: {e}")
+            unresolved.append(name)
+            continue
+        data = cached_download(url, sha256=sha256)
+        wheels[name] = {"name": name, "version": version, "file_name": filename, "data": data}
+        pending.extend((dep, None, False) for dep in wheel_requires_dist(data, environment))
+    return list(wheels.values()), sorted(set(lock_names)), sorted(set(unresolved)), warnings
+
+
+def build_site_packages(
+    build_dir: str,
+    manifest: dict,
+    reuse: dict,
+    *,
+    requirements: list[str],
+    lock: dict,
+    fingerprint: bool = False,
+) -> dict:
+    """Write the snapshot archive; return ``{"path", "extract_dir", "requirements",
+    "packages", "warnings"}``, where requirements is what micropip still installs."""
+    python_version = lock["info"]["python"]
+    environment = pyodide_marker_environment(python_version)
+    key = sha256_json(
+        {
+            "environment": environment,
+            "fingerprint": fingerprint,
+            "python": python_version,
+            "requirements": requirements,
+            "uv_lock": uv_lock_versions(UV_LOCK),
+        }
+    )
+    previous = reuse.get("site_packages", {})
+    if previous.get("key") == key and output_unchanged(
+        build_dir, reuse, previous["path"], previous["sha256"]
+    ):
+        manifest["site_packages"] = previous
+        manifest["outputs"][previous["path"]] = previous["sha256"]
+        return {**previous, "warnings": []}
+
+    wheels, lock_names, unresolved, warnings = _resolve(requirements, lock, environment)
+    entries: dict[str, bytes] = {}
+    owners: dict[str, str] = {}
+    for wheel in sorted(wheels, key=lambda wheel: wheel["name"]):
+        for path, data in _wheel_files(wheel.pop("data")).items():
+            if path in owners:
+                warnings.append(f"{wheel['name']}: {path} already installed by {owners[path]}")
+                continue
+            owners[path] = wheel["name"]
+            entries[path] = data
+
+    snapshot = {wheel["name"] for wheel in wheels}
+    packages = lock.get("packages", {})
+    remaining = [
+        requirement
+        for requirement in requirements
+        if normalize_name(package_name(requirement)) not in snapshot
+    ]
+    listed = {normalize_name(package_name(requirement)) for requirement in remaining}
+    remaining += [
+        f"{name}=={packages[name]['version']}" for name in lock_names if name not in listed
+    ]
+    # Dependencies the build couldn't pin still reach micropip, unpinned.
+    remaining += [name for name in unresolved if name not in listed]
+
+    data = deterministic_zip(entries)
+    digest = sha256_bytes(data)
+    output_path = fingerprinted_path(ARCHIVE_NAME, digest) if fingerprint else ARCHIVE_NAME
+    write_if_changed(os.path.join(build_dir, output_path), data)
+    manifest["outputs"][output_path] = digest
+    manifest["site_packages"] = {
+        "key": key,
+        "path": output_path,
+        "sha256": digest,
+        "size": len(data),
+        "extract_dir": site_packages_dir(python_version),
+        "requirements": remaining,
+        "packages": {wheel["name"]: wheel["version"] for wheel in wheels},
+        "wheels": sorted(wheel["file_name"] for wheel in wheels),
+    }
+    return {**manifest["site_packages"], "warnings": warnings}
@@ -0,0 +1,278 @@
+"""
+Payload size report and budgets for ``build_site.py --size-report``.
+
+Writes ``docs/size-report.json`` with the bytes the site can send a visitor:
+
+- ``index_html``: the page, with its precompressed sizes when ``--precompress`` ran
+- ``inline``: bytes of each app source inlined into index.html (JSON-encoded, as
+  they appear in the page)
+- ``assets``: every other build output (URL-mounted images, example data and app
+  files, bundles, vendored files), keyed by mounted name so fingerprinted paths
+  compare across builds
+- ``wheels``: download bytes per requirement, summed over its closure through the
+  Pyodide lockfile's ``depends`` graph. Requirements that micropip installs from
+  PyPI are listed without a size.
+
+Lockfile package sizes come from ``stlite_requirements.package_sizes`` (vendored
+files, the pyodide-lock-cache/ size cache, then HEAD requests to the CDN). The
+previous build's report is read before it is overwritten, and the two are compared
+entry by entry. ``check_budgets`` applies the limits in size-budgets.json; a
+``null`` or missing limit is not checked, and total growth is only checked when
+every wheel size is known.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+from build_manifest import sha256_bytes, write_if_changed
+from stlite_requirements import (
+    REPO_ROOT,
+    lock_closure,
+    normalize_name,
+    package_name,
+    package_sizes,
+)
+
+REPORT_NAME = "size-report.json"
+BUDGETS_PATH = REPO_ROOT / "size-budgets.json"
+BUDGET_KEYS = (
+    "index_html_bytes",
+    "inline_module_bytes",
+    "asset_bytes",
+    "assets_total_bytes",
+    "wheels_total_bytes",
+    "total_growth_percent",
+)
+
+
+def load_report(build_dir: str) -> dict:
+    try:
+        with open(os.path.join(build_dir, REPORT_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_budgets(path) -> dict:
+    with open(path) as f:
+        budgets = json.load(f)
+    unknown = sorted(set(budgets) - set(BUDGET_KEYS))
+    if unknown:
+        raise ValueError(f"{path}: unknown budget keys {', '.join(unknown)}")
+    return budgets
+
+
+def _output_sizes(build_dir: str, manifest: dict, rel_path: str) -> dict:
+    sizes = {"bytes": os.path.getsize(os.path.join(build_dir, rel_path))}
+    entry = manifest.get("precompressed", {}).get(rel_path)
+    if entry is not None:
+        for encoding, variant in entry["variants"].items():
+            sizes[encoding] = variant["size"]
+    return sizes
+
+
+def _wheel_sizes(
+    requirements: list[str], lock: dict, pyodide_version: str, docs_dir: str
+) -> tuple[dict, list[str]]:
+    packages = lock.get("packages", {})
+    closures = {}
+    pypi = []
+    for requirement in requirements:
+        name = normalize_name(package_name(requirement))
+        if name in packages:
+            closures[name] = (requirement, lock_closure(lock, [name]))
+        else:
+            pypi.append(requirement)
+    names = sorted({dep for _, closure in closures.values() for dep in closure})
+    warnings = []
+    try:
+        sizes = package_sizes(lock, pyodide_version, names, fetch=True, docs_dir=docs_dir)
+    except OSError as e:
+        warnings.append(f"size report: lockfile package sizes unavailable ({e})")
+        sizes = package_sizes(lock, pyodide_version, names, fetch=False, docs_dir=docs_dir)
+
+    wheels = {
+        name: {
+            "requirement": requirement,
+            "bytes": sum(sizes.get(dep, 0) for dep in closure),
+            "packages": {dep: sizes.get(dep) for dep in closure},
+        }
+        for name, (requirement, closure) in sorted(closures.items())
+    }
+    unknown = [name for name in names if name not in sizes]
+    if unknown:
+        warnings.append(
+            "size report: unknown sizes for " + ", ".join(unknown) + " (counted as 0)"
+        )
+    return {
+        "bytes": sum(sizes.get(name, 0) for name in names),
+        "requirements": wheels,
+        "pypi": pypi,
+        "unknown": unknown,
+    }, warnings
+
+
+def build_size_report(
+    build_dir: str,
+    manifest: dict,
+    *,
+    inline_sources: dict[str, str],
+    requirements: list[str],
+    lock: dict,
+    pyodide_version: str,
+) -> tuple[dict, list[str]]:
+    """Return (report, warnings) for the outputs recorded in ``manifest``."""
+    mounted_names = {path: name for name, path in manifest.get("assets", {}).items()}
+    variants = {
+        variant["path"]
+        for entry in manifest.get("precompressed", {}).values()
+        for variant in entry["variants"].values()
+    }
+    assets = {
+        mounted_names.get(rel_path, rel_path): {
+            "path": rel_path,
+            **_output_sizes(build_dir, manifest, rel_path),
+        }
+        for rel_path in sorted(manifest["outputs"])
+        if rel_path not in ("index.html", REPORT_NAME) and rel_path not in variants
+    }
+    modules = {
+        name: len(json.dumps(content).encode()) for name, content in sorted(inline_sources.items())
+    }
+    wheels, warnings = _wheel_sizes(requirements, lock, pyodide_version, build_dir)
+    index_html = _output_sizes(build_dir, manifest, "index.html")
+    asset_bytes = sum(asset["bytes"] for asset in assets.values())
+    report = {
+        "pins": manifest.get("pins", {}),
+        "index_html": index_html,
+        "inline": {"bytes": sum(modules.values()), "modules": modules},
+        "assets": {"bytes": asset_bytes, "files": assets},
+        "wheels": wheels,
+        "total_bytes": index_html["bytes"] + asset_bytes + wheels["bytes"],
+    }
+    return report, warnings
+
+
+def write_size_report(build_dir: str, manifest: dict, report: dict) -> None:
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    write_if_changed(os.path.join(build_dir, REPORT_NAME), text)
+    manifest["outputs"][REPORT_NAME] = sha256_bytes(text.encode())
+
+
+def _totals(report: dict) -> dict[str, int]:
+    if not report:
+        return {}
+    return {
+        "total": report["total_bytes"],
+        "index.html": report["index_html"]["bytes"],
+        "inlined sources": report["inline"]["bytes"],
+        "assets": report["assets"]["bytes"],
+        "lockfile wheels": report["wheels"]["bytes"],
+    }
+
+
+def _entries(report: dict) -> dict[str, int]:
+    """Per-module, per-asset and per-requirement sizes, for comparison."""
+    if not report:
+        return {}
+    entries = {f"inline: {name}": size for name, size in report["inline"]["modules"].items()}
+    for name, asset in report["assets"]["files"].items():
+        entries[f"asset: {name}"] = asset["bytes"]
+    for name, wheel in report["wheels"]["requirements"].items():
+        entries[f"wheels: {name}"] = wheel["bytes"]
+    return entries
+
+
+def diff_reports(previous: dict, report: dict) -> list[dict]:
+    """Entries that were added, removed or changed size: ``{"entry", "before", "after"}``.
+
+    Totals come first, then the largest absolute changes.
+    """
+    def changed(before: dict, after: dict, names) -> list[dict]:
+        return [
+            {"entry": name, "before": before.get(name), "after": after.get(name)}
+            for name in names
+            if before.get(name) != after.get(name)
+        ]
+
+    totals = _totals(report)
+    before, after = _entries(previous), _entries(report)
+    details = changed(before, after, sorted(set(before) | set(after)))
+    details.sort(key=lambda change: -abs((change["after"] or 0) - (change["before"] or 0)))
+    return changed(_totals(previous), totals, totals) + details
+
+
+def check_budgets(report: dict, previous: dict, budgets: dict) -> list[str]:
+    """Budget violations as messages (empty when the report is within budget)."""
+    violations = []
+
+    def over(label: str, size: int, key: str) -> None:
+        limit = budgets.get(key)
+        if limit is not None and size > limit:
+            violations.append(f"{label} is {size} bytes, over the {limit}-byte budget ({key})")
+
+    over("index.html", report["index_html"]["bytes"], "index_html_bytes")
+    for name, size in report["inline"]["modules"].items():
+        over(f"inlined {name}", size, "inline_module_bytes")
+    for name, asset in report["assets"]["files"].items():
+        over(asset["path"], asset["bytes"], "asset_bytes")
+    over("assets", report["assets"]["bytes"], "assets_total_bytes")
+    over("lockfile wheels", report["wheels"]["bytes"], "wheels_total_bytes")
+
+    # Growth is only meaningful when both totals include every wheel.
+    growth = budgets.get("total_growth_percent")
+    if growth is not None and previous and not (
+        previous["wheels"]["unknown"] or report["wheels"]["unknown"]
+    ):
+        limit = previous["total_bytes"] * (1 + growth / 100)
+        if report["total_bytes"] > limit:
+            violations.append(
+                f"total payload grew from {previous['total_bytes']} to {report['total_bytes']} "
+                f"bytes, more than {growth}% (total_growth_percent)"
+            )
+    return violations
+
+
+def _kb(size: int | None) -> str:
+    if size is None:
+        return "-"
+    return f"{size} B" if size < 1000 else f"{size / 1000:,.1f} kB"
+
+
+def _change(before: int | None, after: int | None) -> str:
+    if before is None:
+        return "added"
+    if after is None:
+        return "removed"
+    delta = after - before
+    percent = f" ({delta / before:+.1%})" if before else ""
+    return f"{'+' if delta >= 0 else '-'}{_kb(abs(delta))}{percent}"
+
+
+def format_markdown(
+    report: dict, previous: dict, changes: list[dict], violations: list[str], *, limit: int = 50
+) -> str:
+    """The comparison as Markdown, for a CI job summary or a PR comment."""
+    lines = ["### Build size report", ""]
+    if violations:
+        lines += ["**Over budget:**", ""] + [f"- {message}" for message in violations] + [""]
+    if not previous:
+        lines += [f"No previous report; total payload {_kb(report['total_bytes'])}.", ""]
+        return "\n".join(lines)
+    if not changes:
+        lines += [f"No size changes; total payload {_kb(report['total_bytes'])}.", ""]
+        return "\n".join(lines)
+    lines += ["| Entry | Previous | Current | Change |", "|---|---:|---:|---:|"]
+    for change in changes[:limit]:
+        lines.append(
+            f"| {change['entry']} | {_kb(change['before'])} | {_kb(change['after'])} "
+            f"| {_change(change['before'], change['after'])} |"
+        )
+    if len(changes) > limit:
+        lines.append(f"| ... {len(changes) - limit} more | | | |")
+    if report["wheels"]["pypi"]:
+        lines += ["", "Installed from PyPI (not sized): " + ", ".join(report["wheels"]["pypi"])]
+    lines.append("")
+    return "\n".join(lines)
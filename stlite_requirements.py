@@ -10,6 +10,9 @@ Versions are chosen as follows:
 - Package with only ``>=`` / ``>``: use the version resolved in pmotools-app/uv.lock
 - Otherwise: pass through unpinned (package name only)
 
+Lockfiles are read through lock_index.py: uv.lock is parsed once per change and the
+Pyodide lockfile through a hash-validated index next to its cached JSON.
+
 Run ``make stlite-upgrade`` after bumping @stlite/browser to refresh _PYODIDE_VERSION and
 the cached lockfile under pyodide-lock-cache/.
 """
@@ -23,6 +26,8 @@ import tomllib
 import urllib.request
 from pathlib import Path
 
+from lock_index import load_lock_index, normalize_name, uv_lock_versions
+
 REPO_ROOT = Path(__file__).resolve().parent
 PMOTOOLS_APP = REPO_ROOT / "pmotools-app"
 PYPROJECT = PMOTOOLS_APP / "pyproject.toml"
@@ -48,20 +53,15 @@ def read_pyproject_dependencies() -> list[tuple[str, str]]:
 
 
 def version_from_uv_lock(package: str) -> str | None:
-    if not UV_LOCK.exists():
-        return None
-    text = UV_LOCK.read_text()
-    pattern = (
-        rf'^name = "{re.escape(package)}"\s*\n'
-        r"(?:.*\n)*?"
-        r'^version = "([^"]+)"'
-    )
-    match = re.search(pattern, text, re.MULTILINE)
-    return match.group(1) if match else None
+    return uv_lock_versions(UV_LOCK).get(normalize_name(package))
+
+
+def pyodide_cdn_base_url(version: str) -> str:
+    return f"https://cdn.jsdelivr.net/pyodide/v{version}/full/"
 
 
 def pyodide_lock_url(version: str) -> str:
-    return f"https://cdn.jsdelivr.net/pyodide/v{version}/full/pyodide-lock.json"
+    return f"{pyodide_cdn_base_url(version)}pyodide-lock.json"
 
 
 def fetch_pyodide_lock(
@@ -81,6 +81,82 @@ def fetch_pyodide_lock(
     return data
 
 
+def pyodide_lock_index(pyodide_version: str) -> dict:
+    """Indexed fields of the cached Pyodide lockfile (fetched and cached if missing).
+
+    Use fetch_pyodide_lock() when the full lockfile is needed (e.g. to vendor it).
+    """
+    cache_path = LOCK_CACHE_DIR / f"v{pyodide_version}.json"
+    index = load_lock_index(cache_path)
+    if index is None:
+        fetch_pyodide_lock(pyodide_version, use_cache=False)
+        index = load_lock_index(cache_path)
+    return index
+
+
+def lock_closure(lock: dict, names: list[str]) -> list[str]:
+    """Lockfile package names reachable from names through ``depends`` (sorted)."""
+    packages = lock.get("packages", {})
+    seen: set[str] = set()
+    stack = [normalize_name(n) for n in names if normalize_name(n) in packages]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        stack.extend(
+            normalize_name(dep)
+            for dep in packages[name].get("depends", [])
+            if normalize_name(dep) in packages
+        )
+    return sorted(seen)
+
+
+def sizes_cache_path(pyodide_version: str) -> Path:
+    return LOCK_CACHE_DIR / f"v{pyodide_version}.sizes.json"
+
+
+def package_sizes(
+    lock: dict,
+    pyodide_version: str,
+    names: list[str],
+    *,
+    fetch: bool,
+    docs_dir: Path = REPO_ROOT / "docs",
+) -> dict[str, int]:
+    """Download bytes per lockfile package name (missing when unknown).
+
+    Sizes come from files vendored under ``docs_dir`` by ``--offline``, the size cache
+    pyodide-lock-cache/v<version>.sizes.json, or (with ``fetch``) HEAD requests to the
+    Pyodide CDN, which also update the cache.
+    """
+    cache_path = sizes_cache_path(pyodide_version)
+    cached = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+    vendored_dir = Path(docs_dir) / "assets" / "pyodide" / f"v{pyodide_version}"
+    packages = lock["packages"]
+    sizes: dict[str, int] = {}
+    fetched = False
+    try:
+        for name in names:
+            file_name = packages[name]["file_name"]
+            vendored = vendored_dir / file_name
+            if vendored.is_file():
+                sizes[name] = vendored.stat().st_size
+            elif file_name in cached:
+                sizes[name] = cached[file_name]
+            elif fetch:
+                request = urllib.request.Request(
+                    pyodide_cdn_base_url(pyodide_version) + file_name, method="HEAD"
+                )
+                with urllib.request.urlopen(request, timeout=60) as resp:
+                    cached[file_name] = sizes[name] = int(resp.headers["Content-Length"])
+                fetched = True
+    finally:
+        if fetched:
+            cache_path.write_text(json.dumps(cached, indent=2, sort_keys=True) + "\n")
+    return sizes
+
+
 def pyodide_lock_versions(lock: dict) -> dict[str, str]:
     return {
         pkg["name"]: pkg["version"]
@@ -100,7 +176,7 @@ def resolve_stlite_requirements(
     warnings note when Pyodide overrides a pyproject ``==`` pin.
     """
     if lock is None:
-        lock = fetch_pyodide_lock(pyodide_version)
+        lock = pyodide_lock_index(pyodide_version)
     lock_versions = pyodide_lock_versions(lock)
 
     requirements: list[str] = []
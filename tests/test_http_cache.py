@@ -0,0 +1,157 @@
+import collections
+import http.server
+import threading
+import time
+
+import pytest
+
+from http_cache import CachedHTTPClient
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.server.state
+        path = self.path.partition("?")[0]
+        with state["lock"]:
+            state["hits"][path] += 1
+        if path == "/etag":
+            if self.headers.get("If-None-Match") == ETAG:
+                self._send(304, headers=[("ETag", ETAG)])
+            else:
+                self._send(200, b"etag body", [("ETag", ETAG)])
+        elif path == "/last-modified":
+            if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                self._send(304)
+            else:
+                self._send(200, b"dated body", [("Last-Modified", LAST_MODIFIED)])
+        elif path == "/immutable":
+            self._send(200, b"immutable body", [("ETag", ETAG)])
+        elif path == "/redirect":
+            self._send(302, headers=[("Location", "/nested/../target")])
+        elif path == "/target":
+            self._send(200, b"target body")
+        elif path == "/loop":
+            self._send(301, headers=[("Location", "/loop")])
+        elif path == "/slow":
+            with state["lock"]:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.1)
+            with state["lock"]:
+                state["active"] -= 1
+            self._send(200, self.path.encode())
+        else:
+            self._send(404, b"not found")
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.state = {
+        "lock": threading.Lock(),
+        "hits": collections.Counter(),
+        "active": 0,
+        "peak": 0,
+    }
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}", httpd.state
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    with CachedHTTPClient(cache_dir=tmp_path / "http", max_workers=3) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/etag", "/last-modified"])
+def test_revalidates_cached_entry(server, client, path):
+    base, state = server
+    first = client.get(base + path)
+    second = client.get(base + path)
+
+    assert first == second != b""
+    assert state["hits"][path] == 2
+    assert client.stats == {"requests": 2, "not_modified": 1, "cache_hits": 0}
+
+
+def test_revalidates_across_clients(server, client, tmp_path):
+    base, _ = server
+    body = client.get(base + "/etag")
+    with CachedHTTPClient(cache_dir=tmp_path / "http") as other:
+        assert other.get(base + "/etag") == body
+        assert other.stats["not_modified"] == 1
+
+
+def test_immutable_entry_served_without_request(server, client):
+    base, state = server
+    assert client.get(base + "/immutable", immutable=True) == b"immutable body"
+    assert client.get(base + "/immutable", immutable=True) == b"immutable body"
+
+    assert state["hits"]["/immutable"] == 1
+    assert client.stats == {"requests": 1, "not_modified": 0, "cache_hits": 1}
+
+
+def test_mutable_entry_is_revalidated(server, client):
+    base, state = server
+    client.get(base + "/immutable")
+    client.get(base + "/immutable")
+    assert state["hits"]["/immutable"] == 2
+
+
+def test_without_cache_dir_every_get_requests(server):
+    base, state = server
+    with CachedHTTPClient(cache_dir=None) as client:
+        client.get(base + "/etag")
+        client.get(base + "/etag", immutable=True)
+    assert state["hits"]["/etag"] == 2
+
+
+def test_follows_redirects(server, client):
+    base, state = server
+    assert client.get(base + "/redirect") == b"target body"
+    assert state["hits"]["/redirect"] == 1
+    assert state["hits"]["/target"] == 1
+
+
+def test_redirect_loop_raises(server, client):
+    base, _ = server
+    with pytest.raises(RuntimeError, match="Too many redirects"):
+        client.get(base + "/loop")
+
+
+def test_error_status_raises(server, client):
+    base, _ = server
+    with pytest.raises(RuntimeError, match=r"^HTTP 404 for .*/missing: not found"):
+        client.get(base + "/missing")
+
+
+def test_map_bounds_concurrency(server, client):
+    base, state = server
+    urls = [f"{base}/slow?{i}" for i in range(12)]
+
+    bodies = list(client.map(client.get, urls))
+
+    assert bodies == [f"/slow?{i}".encode() for i in range(12)]
+    assert state["peak"] == client.max_workers
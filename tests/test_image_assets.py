@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("PIL")
+
+from image_assets import ImageOptimizer
+
+
+@pytest.fixture
+def optimizer(tmp_path):
+    optimizer = ImageOptimizer(str(tmp_path), {"outputs": {}}, {})
+    for name in ("PMO_logo", "a"):
+        webp = f"images/{name}.webp"
+        optimizer.record(
+            f"images/{name}.png", {"name": webp, "path": webp, "sha256": "", "favicons": []}
+        )
+    return optimizer
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ('st.image("images/PMO_logo.png")', 'st.image("images/PMO_logo.webp")'),
+        ("st.image('pmotools-app/images/PMO_logo.png')", "st.image('pmotools-app/images/PMO_logo.webp')"),
+        ('path = f"{root}/images/a.png"', 'path = f"{root}/images/a.webp"'),
+        ('doc = """\nimages/a.png"""', 'doc = """\nimages/a.png"""'),
+        ('st.image("images/PMO_logo.png.bak")', 'st.image("images/PMO_logo.png.bak")'),
+        ('st.image("myimages/PMO_logo.png")', 'st.image("myimages/PMO_logo.png")'),
+        ('st.image("PMO_logo.png")', 'st.image("PMO_logo.png")'),
+        ("# images/PMO_logo.png", "# images/PMO_logo.png"),
+    ],
+)
+def test_rewrites_mounted_paths_in_string_literals(optimizer, line, expected):
+    assert optimizer.rewrite_references({"page.py": line + "\n"}) == {"page.py": expected + "\n"}
+
+
+def test_leaves_other_files_alone(optimizer):
+    sources = {"README.md": '"images/a.png"', "page.py": "x = 1\n"}
+    assert optimizer.rewrite_references(sources) == sources